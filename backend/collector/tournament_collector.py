@@ -1,4 +1,6 @@
 # collector/tournament_collector.py
+import csv
+import io
 import requests
 import logging
 from datetime import datetime, timedelta
@@ -7,12 +9,70 @@ from sqlalchemy.orm import sessionmaker
 from models.models import Tournament, TournamentEvent
 from models.models import Base
 from sqlalchemy import create_engine
+from psycopg2.errors import UniqueViolation
+from psycopg2.extras import execute_values
+
+TOURNAMENT_COLUMNS = (
+    'tournament_id', 'identification_code', 'name', 'image', 'is_cancelled',
+    'start_date_time', 'end_date_time', 'time_zone', 'time_zone_start_date_time',
+    'time_zone_end_date_time', 'url', 'root_provider_id',
+    'location_id', 'location_name', 'primary_location_town', 'primary_location_county',
+    'primary_location_address1', 'primary_location_address2', 'primary_location_address3',
+    'primary_location_postcode', 'geo_latitude', 'geo_longitude',
+    'level_id', 'level_name', 'level_branding',
+    'organization_id', 'organization_name', 'organization_conference', 'organization_division',
+    'organization_url_segment', 'organization_parent_region_id', 'organization_region_id',
+    'entries_open_date_time', 'entries_close_date_time', 'seconds_until_entries_close',
+    'seconds_until_entries_open', 'registration_time_zone',
+    'is_dual_match', 'tournament_type',
+    'gender', 'event_types', 'level_category', 'registration_status',
+)
+
+TOURNAMENT_EVENT_COLUMNS = ('event_id', 'tournament_id', 'gender', 'event_type')
+
+# Only overwritten when the API actually sends a value
+CONDITIONAL_UPDATE_COLUMNS = (
+    'time_zone', 'url', 'location_name', 'primary_location_town', 'primary_location_county',
+    'organization_name', 'organization_conference', 'organization_division',
+)
+
+COPY_TOURNAMENTS_SQL = f"COPY tournaments ({', '.join(TOURNAMENT_COLUMNS)}) FROM STDIN WITH (FORMAT CSV)"
+COPY_TOURNAMENT_EVENTS_SQL = f"COPY tournament_events ({', '.join(TOURNAMENT_EVENT_COLUMNS)}) FROM STDIN WITH (FORMAT CSV)"
+
+UPSERT_TOURNAMENTS_SQL = (
+    f"INSERT INTO tournaments ({', '.join(TOURNAMENT_COLUMNS)}) VALUES %s "
+    "ON CONFLICT (tournament_id) DO UPDATE SET "
+    + ', '.join(
+        f"{column} = COALESCE(EXCLUDED.{column}, tournaments.{column})"
+        if column in CONDITIONAL_UPDATE_COLUMNS
+        else f"{column} = EXCLUDED.{column}"
+        for column in TOURNAMENT_COLUMNS if column != 'tournament_id'
+    )
+    + ", updated_at = NOW()"
+)
+
+UPSERT_TOURNAMENT_EVENTS_SQL = (
+    f"INSERT INTO tournament_events ({', '.join(TOURNAMENT_EVENT_COLUMNS)}) VALUES %s "
+    "ON CONFLICT (event_id) DO UPDATE SET tournament_id = EXCLUDED.tournament_id, "
+    "gender = EXCLUDED.gender, event_type = EXCLUDED.event_type, updated_at = NOW()"
+)
+
+
+def _csv_buffer(rows: List[tuple]) -> io.StringIO:
+    """Serialize rows for COPY; None becomes an unquoted empty field, which COPY reads as NULL"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    return buffer
 
 class TournamentCollector:
-    def __init__(self, database_url: str):
-        """Initialize the tournament collector with database connection"""
+    def __init__(self, database_url: str, engine=None):
+        """Initialize the tournament collector with database connection.
+
+        Pass engine to reuse an existing connection pool instead of opening a new one.
+        """
         self.database_url = database_url
-        self.engine = create_engine(database_url)
+        self.engine = engine if engine is not None else create_engine(database_url)
         Base.metadata.bind = self.engine
         self.Session = sessionmaker(bind=self.engine)
         
@@ -138,6 +198,126 @@ class TournamentCollector:
             
             session.add(tournament_event)
 
+    def build_tournament_row(self, tournament_item: Dict[str, Any]) -> Dict[str, Any]:
+        """Flatten a tournament search result into a tournaments table row"""
+        # Classify tournament type
+        is_dual_match, tournament_type = self.classify_tournament_type(tournament_item)
+
+        # Parse dates
+        start_datetime = None
+        end_datetime = None
+        if tournament_item.get('startDateTime'):
+            start_datetime = datetime.fromisoformat(tournament_item['startDateTime'].replace('Z', '+00:00'))
+        if tournament_item.get('endDateTime'):
+            end_datetime = datetime.fromisoformat(tournament_item['endDateTime'].replace('Z', '+00:00'))
+
+        # Parse registration dates
+        reg_restrictions = tournament_item.get('registrationRestrictions', {})
+        entries_open_dt = None
+        entries_close_dt = None
+        if reg_restrictions.get('entriesOpenDateTime'):
+            entries_open_dt = datetime.fromisoformat(reg_restrictions['entriesOpenDateTime'].replace('Z', '+00:00'))
+        if reg_restrictions.get('entriesCloseDateTime'):
+            entries_close_dt = datetime.fromisoformat(reg_restrictions['entriesCloseDateTime'].replace('Z', '+00:00'))
+
+        # Extract location info
+        location = tournament_item.get('location', {})
+        primary_location = tournament_item.get('primaryLocation', {})
+        geo = location.get('geo', {})
+
+        # Extract level info
+        level = tournament_item.get('level', {})
+
+        # Extract organization info
+        organization = tournament_item.get('organization', {})
+
+        # Extract additional tournament info
+        gender = None
+        event_types = []
+
+        # Extract from events
+        for event in tournament_item.get('events', []):
+            division = event.get('division', {})
+            if division.get('gender') and not gender:
+                gender = division['gender']
+            if division.get('eventType'):
+                event_types.append(division['eventType'])
+
+        # Extract level category
+        level_category = None
+        level_categories = tournament_item.get('levelCategories', [])
+        if level_categories:
+            level_category = level_categories[0].get('name')
+
+        # Calculate registration status
+        registration_status = 'CLOSED'  # Default
+        seconds_until_close = reg_restrictions.get('secondsUntilEntriesClose')
+        seconds_until_open = reg_restrictions.get('secondsUntilEntriesOpen')
+
+        if seconds_until_open is not None and seconds_until_open > 0:
+            registration_status = 'UPCOMING'
+        elif seconds_until_close is not None and seconds_until_close > 0:
+            registration_status = 'OPEN'
+        else:
+            registration_status = 'CLOSED'
+
+        return {
+            'tournament_id': tournament_item.get('id'),
+            'identification_code': tournament_item.get('identificationCode'),
+            'name': tournament_item.get('name'),
+            'image': tournament_item.get('image'),
+            'is_cancelled': tournament_item.get('isCancelled', False),
+            'start_date_time': start_datetime,
+            'end_date_time': end_datetime,
+            'time_zone': tournament_item.get('timeZone'),
+            'time_zone_start_date_time': datetime.fromisoformat(tournament_item['timeZoneStartDateTime'].replace('Z', '+00:00')) if tournament_item.get('timeZoneStartDateTime') else None,
+            'time_zone_end_date_time': datetime.fromisoformat(tournament_item['timeZoneEndDateTime'].replace('Z', '+00:00')) if tournament_item.get('timeZoneEndDateTime') else None,
+            'url': tournament_item.get('url'),
+            'root_provider_id': tournament_item.get('rootProviderId'),
+
+            # Location
+            'location_id': location.get('id'),
+            'location_name': location.get('name'),
+            'primary_location_town': primary_location.get('town'),
+            'primary_location_county': primary_location.get('county'),
+            'primary_location_address1': primary_location.get('address1'),
+            'primary_location_address2': primary_location.get('address2'),
+            'primary_location_address3': primary_location.get('address3'),
+            'primary_location_postcode': primary_location.get('postcode'),
+            'geo_latitude': geo.get('latitude', 0),
+            'geo_longitude': geo.get('longitude', 0),
+
+            # Level
+            'level_id': level.get('id'),
+            'level_name': level.get('name'),
+            'level_branding': level.get('branding'),
+
+            # Organization
+            'organization_id': organization.get('id'),
+            'organization_name': organization.get('name'),
+            'organization_conference': organization.get('conference'),
+            'organization_division': organization.get('division'),
+            'organization_url_segment': organization.get('urlSegment'),
+            'organization_parent_region_id': organization.get('parentRegionId'),
+            'organization_region_id': organization.get('regionId'),
+
+            # Registration
+            'entries_open_date_time': entries_open_dt,
+            'entries_close_date_time': entries_close_dt,
+            'seconds_until_entries_close': reg_restrictions.get('secondsUntilEntriesClose'),
+            'seconds_until_entries_open': reg_restrictions.get('secondsUntilEntriesOpen'),
+            'registration_time_zone': reg_restrictions.get('timeZone'),
+
+            # Classification
+            'is_dual_match': is_dual_match,
+            'tournament_type': tournament_type,
+
+            'gender': gender,
+            'event_types': ','.join(set(event_types)) if event_types else None,
+            'level_category': level_category,
+            'registration_status': registration_status
+        }
+
     def store_tournament_data(self, tournaments_data: Dict[str, Any]) -> None:
         """Store tournament data in the database"""
         if not self.Session:
@@ -166,102 +346,30 @@ class TournamentCollector:
                     # Check if tournament already exists
                     existing_tournament = session.query(Tournament).filter_by(tournament_id=tournament_id).first()
                     
-                    # Classify tournament type
-                    is_dual_match, tournament_type = self.classify_tournament_type(tournament_item)
-                    
-                    # Parse dates
-                    start_datetime = None
-                    end_datetime = None
-                    if tournament_item.get('startDateTime'):
-                        start_datetime = datetime.fromisoformat(tournament_item['startDateTime'].replace('Z', '+00:00'))
-                    if tournament_item.get('endDateTime'):
-                        end_datetime = datetime.fromisoformat(tournament_item['endDateTime'].replace('Z', '+00:00'))
-                    
-                    # Parse registration dates
-                    reg_restrictions = tournament_item.get('registrationRestrictions', {})
-                    entries_open_dt = None
-                    entries_close_dt = None
-                    if reg_restrictions.get('entriesOpenDateTime'):
-                        entries_open_dt = datetime.fromisoformat(reg_restrictions['entriesOpenDateTime'].replace('Z', '+00:00'))
-                    if reg_restrictions.get('entriesCloseDateTime'):
-                        entries_close_dt = datetime.fromisoformat(reg_restrictions['entriesCloseDateTime'].replace('Z', '+00:00'))
-                    
-                    # Extract location info
-                    location = tournament_item.get('location', {})
-                    primary_location = tournament_item.get('primaryLocation', {})
-                    geo = location.get('geo', {})
-                    
-                    # Extract level info
-                    level = tournament_item.get('level', {})
-                    
-                    # Extract organization info
-                    organization = tournament_item.get('organization', {})
-
-                    # Extract additional tournament info
-                    gender = None
-                    event_types = []
-
-                    # Extract from events
-                    for event in tournament_item.get('events', []):
-                        division = event.get('division', {})
-                        if division.get('gender') and not gender:
-                            gender = division['gender']
-                        if division.get('eventType'):
-                            event_types.append(division['eventType'])
-
-                    # Extract level category
-                    level_category = None
-                    level_categories = tournament_item.get('levelCategories', [])
-                    if level_categories:
-                        level_category = level_categories[0].get('name')
-
-                    # Calculate registration status
-                    registration_status = 'CLOSED'  # Default
-                    seconds_until_close = reg_restrictions.get('secondsUntilEntriesClose')
-                    seconds_until_open = reg_restrictions.get('secondsUntilEntriesOpen')
-
-                    if seconds_until_open is not None and seconds_until_open > 0:
-                        registration_status = 'UPCOMING'
-                    elif seconds_until_close is not None and seconds_until_close > 0:
-                        registration_status = 'OPEN'
-                    else:
-                        registration_status = 'CLOSED'
-                    
+                    row = self.build_tournament_row(tournament_item)
+
                     if existing_tournament:
                         # Update existing tournament (similar to your team update pattern)
                         logging.info(f"Updating existing tournament: {tournament_id}")
                         
-                        existing_tournament.name = tournament_item.get('name')
-                        existing_tournament.image = tournament_item.get('image')
-                        existing_tournament.is_cancelled = tournament_item.get('isCancelled', False)
-                        existing_tournament.start_date_time = start_datetime
-                        existing_tournament.end_date_time = end_datetime
-                        existing_tournament.is_dual_match = is_dual_match
-                        existing_tournament.tournament_type = tournament_type
+                        existing_tournament.name = row['name']
+                        existing_tournament.image = row['image']
+                        existing_tournament.is_cancelled = row['is_cancelled']
+                        existing_tournament.start_date_time = row['start_date_time']
+                        existing_tournament.end_date_time = row['end_date_time']
+                        existing_tournament.is_dual_match = row['is_dual_match']
+                        existing_tournament.tournament_type = row['tournament_type']
                         existing_tournament.updated_at = datetime.utcnow()
                         
                         # Update other fields only if they have values (following your pattern)
-                        if tournament_item.get('timeZone'):
-                            existing_tournament.time_zone = tournament_item['timeZone']
-                        if tournament_item.get('url'):
-                            existing_tournament.url = tournament_item['url']
-                        if location.get('name'):
-                            existing_tournament.location_name = location['name']
-                        if primary_location.get('town'):
-                            existing_tournament.primary_location_town = primary_location['town']
-                        if primary_location.get('county'):
-                            existing_tournament.primary_location_county = primary_location['county']
-                        if organization.get('name'):
-                            existing_tournament.organization_name = organization['name']
-                        if organization.get('conference'):
-                            existing_tournament.organization_conference = organization['conference']
-                        if organization.get('division'):
-                            existing_tournament.organization_division = organization['division']
+                        for column in CONDITIONAL_UPDATE_COLUMNS:
+                            if row[column]:
+                                setattr(existing_tournament, column, row[column])
                         
-                        existing_tournament.gender = gender
-                        existing_tournament.event_types = ','.join(set(event_types)) if event_types else None
-                        existing_tournament.level_category = level_category
-                        existing_tournament.registration_status = registration_status
+                        existing_tournament.gender = row['gender']
+                        existing_tournament.event_types = row['event_types']
+                        existing_tournament.level_category = row['level_category']
+                        existing_tournament.registration_status = row['registration_status']
 
                         session.merge(existing_tournament)
                         updated_count += 1
@@ -270,62 +378,7 @@ class TournamentCollector:
                         # Create new tournament
                         logging.info(f"Creating new tournament: {tournament_id}")
                         
-                        tournament = Tournament(
-                            tournament_id=tournament_id,
-                            identification_code=tournament_item.get('identificationCode'),
-                            name=tournament_item.get('name'),
-                            image=tournament_item.get('image'),
-                            is_cancelled=tournament_item.get('isCancelled', False),
-                            start_date_time=start_datetime,
-                            end_date_time=end_datetime,
-                            time_zone=tournament_item.get('timeZone'),
-                            time_zone_start_date_time=datetime.fromisoformat(tournament_item['timeZoneStartDateTime'].replace('Z', '+00:00')) if tournament_item.get('timeZoneStartDateTime') else None,
-                            time_zone_end_date_time=datetime.fromisoformat(tournament_item['timeZoneEndDateTime'].replace('Z', '+00:00')) if tournament_item.get('timeZoneEndDateTime') else None,
-                            url=tournament_item.get('url'),
-                            root_provider_id=tournament_item.get('rootProviderId'), 
-                            
-                            # Location
-                            location_id=location.get('id'),
-                            location_name=location.get('name'),
-                            primary_location_town=primary_location.get('town'),
-                            primary_location_county=primary_location.get('county'),
-                            primary_location_address1=primary_location.get('address1'),
-                            primary_location_address2=primary_location.get('address2'),
-                            primary_location_address3=primary_location.get('address3'),
-                            primary_location_postcode=primary_location.get('postcode'),
-                            geo_latitude=geo.get('latitude', 0),
-                            geo_longitude=geo.get('longitude', 0),
-                            
-                            # Level
-                            level_id=level.get('id'),
-                            level_name=level.get('name'),
-                            level_branding=level.get('branding'),
-                            
-                            # Organization
-                            organization_id=organization.get('id'),
-                            organization_name=organization.get('name'),
-                            organization_conference=organization.get('conference'),
-                            organization_division=organization.get('division'),
-                            organization_url_segment=organization.get('urlSegment'),
-                            organization_parent_region_id=organization.get('parentRegionId'),
-                            organization_region_id=organization.get('regionId'),
-                            
-                            # Registration
-                            entries_open_date_time=entries_open_dt,
-                            entries_close_date_time=entries_close_dt,
-                            seconds_until_entries_close=reg_restrictions.get('secondsUntilEntriesClose'),
-                            seconds_until_entries_open=reg_restrictions.get('secondsUntilEntriesOpen'),
-                            registration_time_zone=reg_restrictions.get('timeZone'),
-                            
-                            # Classification
-                            is_dual_match=is_dual_match,
-                            tournament_type=tournament_type,
-
-                            gender=gender,
-                            event_types=','.join(set(event_types)) if event_types else None,
-                            level_category=level_category,
-                            registration_status=registration_status
-                        )
+                        tournament = Tournament(**row)
                         
                         session.add(tournament)
                         session.flush()  # Get the ID
@@ -350,11 +403,80 @@ class TournamentCollector:
         finally:
             session.close()
 
+    def bulk_store_tournament_data(self, tournaments_data: Dict[str, Any]) -> None:
+        """Store a page of tournaments with COPY, falling back to an upsert when rows already exist.
+
+        Used by the initial seed, where the tables start empty and the per-row ORM
+        lookups in store_tournament_data dominate the load time.
+        """
+        search_results = tournaments_data.get('searchResults', [])
+        if not search_results:
+            logging.warning("No tournament results found in data")
+            return
+
+        # Key by id so a tournament repeated across the page can't trip the primary key
+        tournaments = {}
+        events = {}
+        for result in search_results:
+            tournament_item = result.get('item', {})
+            tournament_id = tournament_item.get('id')
+            if not tournament_id:
+                logging.warning("Tournament missing ID, skipping")
+                continue
+
+            row = self.build_tournament_row(tournament_item)
+            tournaments[tournament_id] = tuple(row[column] for column in TOURNAMENT_COLUMNS)
+
+            for event_data in tournament_item.get('events', []):
+                if not event_data.get('id'):
+                    continue
+                division = event_data.get('division', {})
+                events[event_data.get('id')] = (
+                    event_data.get('id'),
+                    tournament_id,
+                    division.get('gender'),
+                    division.get('eventType'),
+                )
+
+        tournament_rows = list(tournaments.values())
+        event_rows = list(events.values())
+        tournament_ids = list(tournaments)
+
+        conn = self.engine.raw_connection()
+        try:
+            cur = conn.cursor()
+            try:
+                cur.execute("DELETE FROM tournament_events WHERE tournament_id = ANY(%s)", (tournament_ids,))
+                cur.copy_expert(COPY_TOURNAMENTS_SQL, _csv_buffer(tournament_rows))
+                cur.copy_expert(COPY_TOURNAMENT_EVENTS_SQL, _csv_buffer(event_rows))
+                conn.commit()
+                logging.info(f"Copied {len(tournament_rows)} tournaments and {len(event_rows)} events")
+            except UniqueViolation:
+                # Some of the page is already stored, so COPY can't be used for it
+                conn.rollback()
+                cur.execute("DELETE FROM tournament_events WHERE tournament_id = ANY(%s)", (tournament_ids,))
+                execute_values(cur, UPSERT_TOURNAMENTS_SQL, tournament_rows, page_size=1000)
+                execute_values(cur, UPSERT_TOURNAMENT_EVENTS_SQL, event_rows, page_size=1000)
+                conn.commit()
+                logging.info(f"Upserted {len(tournament_rows)} tournaments and {len(event_rows)} events")
+            finally:
+                cur.close()
+        except Exception as e:
+            conn.rollback()
+            logging.error(f"Error bulk storing tournament data: {str(e)}")
+            raise
+        finally:
+            conn.close()
+
     def collect_tournaments_range(self, 
                                 start_date: Optional[str] = None,
                                 end_date: Optional[str] = None,
-                                batch_size: int = 100):
-        """Collect tournaments for a specific date range with pagination"""
+                                batch_size: int = 100,
+                                bulk_load: bool = False):
+        """Collect tournaments for a specific date range with pagination.
+
+        bulk_load stores each page with COPY instead of the ORM, for seeding empty tables.
+        """
         
         if not start_date:
             # Default to collecting from today onwards
@@ -379,19 +501,30 @@ class TournamentCollector:
                 break
             
             # Store the data
-            self.store_tournament_data(data)
+            if bulk_load:
+                self.bulk_store_tournament_data(data)
+            else:
+                self.store_tournament_data(data)
             
             # Check if we've reached the end
             search_results = data.get('searchResults', [])
             total_available = data.get('total', 0)
             
             total_processed += len(search_results)
-            offset += batch_size
+            # Advance by what was returned: the API may cap size below batch_size
+            offset += len(search_results)
             
             logging.info(f"Processed {total_processed} out of {total_available} tournaments")
             
             # If we've processed all available data, stop
-            if total_processed >= total_available or len(search_results) < batch_size:
+            if total_available:
+                if total_processed >= total_available:
+                    break
+                if len(search_results) < batch_size:
+                    logging.warning(f"API returned {len(search_results)} tournaments for a page size of {batch_size}; "
+                                    f"{total_available - total_processed} remain, continuing")
+            elif len(search_results) < batch_size:
+                # No total to go by, so a short page is the only sign of the end
                 break
         
         logging.info(f"Tournament collection complete. Total processed: {total_processed}")
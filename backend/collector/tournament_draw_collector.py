@@ -17,6 +17,21 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy import create_engine, text
 from models.models import Base, TournamentEvent, Tournament
 
+# Participant and winner fields of a tournament_matches row, filled in per side
+EMPTY_MATCH_FIELDS = {
+    'winner_participant_id': None,
+    'winner_participant_name': None,
+    **{
+        f'side{side}_{field}': None
+        for side in (1, 2)
+        for field in (
+            'participant_id', 'participant_name', 'draw_position', 'seed_number',
+            'school_name', 'school_id', 'player1_id', 'player1_name',
+            'player2_id', 'player2_name'
+        )
+    }
+}
+
 def setup_logging():
     """Set up logging configuration"""
     logging.basicConfig(
@@ -312,110 +327,102 @@ class StandaloneTournamentCollector:
             logging.error(f"❌ Error fetching tournament data: {str(e)}")
             return None
 
+    def extract_school_info(self, participant: Dict[str, Any]) -> tuple:
+        """Return (school_name, school_id) from a participant's first team"""
+        teams = participant.get('teams', [])
+        school_name = None
+        school_id = None
+        
+        if teams and len(teams) > 0:
+            team = teams[0]  # Take first team
+            school_name = team.get('participantOtherName') or team.get('participantName')
+            school_id = team.get('teamId') or team.get('participantId')
+            if school_id:
+                school_id = school_id.upper()
+        
+        return school_name, school_id
+
     def build_participants_lookup(self, event_data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
         """Build lookup dictionary for participants with uppercase keys"""
         participants_lookup = {}
         individual_participants = {}
+        pairs = []
         
         participants = event_data.get('participants', [])
         
-        # First pass: collect all individual participants
+        # First pass: collect all individual participants, setting pairs aside
+        # until every individual they can refer to is known
         for participant in participants:
             participant_id = participant.get('participantId', '').upper()
-            participant_name = participant.get('participantName', 'Unknown Player')
             participant_type = participant.get('participantType', 'INDIVIDUAL')
             
             if not participant_id:
                 continue
             
-            # Extract school/team information
-            teams = participant.get('teams', [])
-            school_name = None
-            school_id = None
-            
-            if teams and len(teams) > 0:
-                team = teams[0]  # Take first team
-                school_name = team.get('participantOtherName') or team.get('participantName')
-                school_id = team.get('teamId') or team.get('participantId')
-                if school_id:
-                    school_id = school_id.upper()
-            
-            if participant_type == 'INDIVIDUAL':
-                individual_participants[participant_id] = {
-                    'name': participant_name,
-                    'school_name': school_name,
-                    'school_id': school_id
-                }
-                participants_lookup[participant_id] = {
-                    'name': participant_name,
-                    'type': 'INDIVIDUAL',
-                    'individual_ids': [participant_id],
-                    'individual_names': [participant_name],
-                    'school_name': school_name,
-                    'school_id': school_id
-                }
+            if participant_type == 'PAIR':
+                pairs.append((participant_id, participant))
+                continue
             
-            elif participant_type == 'PAIR':
-                individual_ids = participant.get('individualParticipantIds', [])
-                individual_ids = [pid.upper() for pid in individual_ids]
-                
-                # Get individual names and school info for the pair
-                individual_names = []
-                pair_school_name = school_name  # Pair's school (if any)
-                pair_school_id = school_id
-                
-                for ind_id in individual_ids:
-                    # Look for the individual in the current participants list
-                    ind_name = None
-                    ind_school_name = None
-                    ind_school_id = None
-                    
-                    for p in participants:
-                        if p.get('participantId', '').upper() == ind_id:
-                            ind_name = p.get('participantName', 'Unknown Player')
-                            
-                            # Get school info from individual participant
-                            ind_teams = p.get('teams', [])
-                            if ind_teams and len(ind_teams) > 0:
-                                ind_team = ind_teams[0]
-                                ind_school_name = ind_team.get('participantOtherName') or ind_team.get('participantName')
-                                ind_school_id = ind_team.get('teamId') or ind_team.get('participantId')
-                                if ind_school_id:
-                                    ind_school_id = ind_school_id.upper()
-                            break
-                    
-                    if not ind_name:
-                        # Fallback to individual_participants if already processed
-                        ind_info = individual_participants.get(ind_id, {})
-                        ind_name = ind_info.get('name', f'Player_{ind_id[:8]}')
-                        ind_school_name = ind_info.get('school_name')
-                        ind_school_id = ind_info.get('school_id')
-                    
-                    individual_names.append(ind_name)
-                    
-                    # Use individual's school info if pair doesn't have school info
-                    if not pair_school_name and ind_school_name:
-                        pair_school_name = ind_school_name
-                        pair_school_id = ind_school_id
-                
-                participants_lookup[participant_id] = {
-                    'name': participant_name,  # e.g., "Main/Tsai"
-                    'type': 'PAIR',
-                    'individual_ids': individual_ids,
-                    'individual_names': individual_names,
-                    'school_name': pair_school_name,
-                    'school_id': pair_school_id
-                }
+            if participant_type != 'INDIVIDUAL':
+                continue
+            
+            participant_name = participant.get('participantName', 'Unknown Player')
+            school_name, school_id = self.extract_school_info(participant)
+            
+            individual_participants[participant_id] = {
+                'name': participant_name,
+                'school_name': school_name,
+                'school_id': school_id
+            }
+            participants_lookup[participant_id] = {
+                'name': participant_name,
+                'type': 'INDIVIDUAL',
+                'individual_ids': [participant_id],
+                'individual_names': [participant_name],
+                'school_name': school_name,
+                'school_id': school_id
+            }
+        
+        # Second pass: resolve pairs against the individuals by id
+        for participant_id, participant in pairs:
+            individual_ids = [pid.upper() for pid in participant.get('individualParticipantIds', [])]
+            members = [individual_participants.get(ind_id) for ind_id in individual_ids]
+            
+            individual_names = [
+                member['name'] if member else f'Player_{ind_id[:8]}'
+                for ind_id, member in zip(individual_ids, members)
+            ]
+            
+            # Use the first member's school if the pair itself has none
+            pair_school_name, pair_school_id = self.extract_school_info(participant)
+            if not pair_school_name:
+                for member in members:
+                    if member and member['school_name']:
+                        pair_school_name = member['school_name']
+                        pair_school_id = member['school_id']
+                        break
+            
+            participants_lookup[participant_id] = {
+                'name': participant.get('participantName', 'Unknown Player'),  # e.g., "Main/Tsai"
+                'type': 'PAIR',
+                'individual_ids': individual_ids,
+                'individual_names': individual_names,
+                'school_name': pair_school_name,
+                'school_id': pair_school_id
+            }
         
         logging.info(f"📋 Built participants lookup with {len(participants_lookup)} participants")
         return participants_lookup
 
     def extract_draw_info_from_working_api(self, draw_data: Dict[str, Any], tournament_id: str, event_id: str) -> Dict[str, Any]:
-        """Extract draw information for tournament_draws table from working API format"""
+        """Extract draw information for tournament_draws table from working API format.
+
+        tournament_id and event_id must already be uppercase.
+        """
         draw_info = {
             'draw_id': draw_data.get('drawId', '').upper(),
-            'tournament_id': tournament_id.upper(),
-            'event_id': event_id.upper(),
+            'tournament_id': tournament_id,
+            'event_id': event_id,
             'draw_name': draw_data.get('drawName', ''),
             'draw_type': draw_data.get('drawType', ''),
             'draw_size': len(draw_data.get('structures', [{}])[0].get('positionAssignments', [])),
@@ -445,14 +452,20 @@ class StandaloneTournamentCollector:
         return draw_info
 
     def extract_tournament_match_from_working_api(self, match_data: Dict[str, Any], participants_lookup: Dict[str, Any], tournament_id: str, event_id: str) -> Dict[str, Any]:
-        """Extract match information for tournament_matches table from working API format"""
+        """Extract match information for tournament_matches table from working API format.
+
+        tournament_id and event_id must already be uppercase.
+        """
         
-        # Extract basic match info
-        match_info = {
+        # Start from the all-None participant/winner fields and fill in the basics
+        match_info = EMPTY_MATCH_FIELDS.copy()
+        schedule = match_data.get('schedule', {})
+        score = match_data.get('score', {})
+        match_info.update({
             'match_up_id': match_data.get('matchUpId', '').upper(),
             'draw_id': match_data.get('drawId', '').upper(),
-            'tournament_id': tournament_id.upper(),
-            'event_id': event_id.upper(),
+            'tournament_id': tournament_id,
+            'event_id': event_id,
             'round_name': match_data.get('roundName', ''),
             'round_number': match_data.get('roundNumber', 0),
             'round_position': match_data.get('roundPosition', 0),
@@ -462,38 +475,14 @@ class StandaloneTournamentCollector:
             'stage': match_data.get('stage', ''),
             'structure_name': match_data.get('structureName', ''),
             'winning_side': match_data.get('winningSide'),
-            'winner_participant_id': None,
-            'winner_participant_name': None,
-            'scheduled_date': match_data.get('schedule', {}).get('scheduledDate'),
-            'scheduled_time': match_data.get('schedule', {}).get('scheduledTime'),
-            'venue_name': match_data.get('schedule', {}).get('venueName'),
-            'score_side1': match_data.get('score', {}).get('scoreStringSide1', ''),
-            'score_side2': match_data.get('score', {}).get('scoreStringSide2', ''),
+            'scheduled_date': schedule.get('scheduledDate'),
+            'scheduled_time': schedule.get('scheduledTime'),
+            'venue_name': schedule.get('venueName'),
+            'score_side1': score.get('scoreStringSide1', ''),
+            'score_side2': score.get('scoreStringSide2', ''),
             'created_at_api': match_data.get('createdAt'),
-            'updated_at_api': match_data.get('updatedAt'),
-            
-            # Initialize all participant fields
-            'side1_participant_id': None,
-            'side1_participant_name': None,
-            'side1_draw_position': None,
-            'side1_seed_number': None,
-            'side1_school_name': None,
-            'side1_school_id': None,
-            'side1_player1_id': None,
-            'side1_player1_name': None,
-            'side1_player2_id': None,
-            'side1_player2_name': None,
-            'side2_participant_id': None,
-            'side2_participant_name': None,
-            'side2_draw_position': None,
-            'side2_seed_number': None,
-            'side2_school_name': None,
-            'side2_school_id': None,
-            'side2_player1_id': None,
-            'side2_player1_name': None,
-            'side2_player2_id': None,
-            'side2_player2_name': None
-        }
+            'updated_at_api': match_data.get('updatedAt')
+        })
         
         # Extract participant information from sides
         sides = match_data.get('sides', [])
@@ -738,6 +727,10 @@ class StandaloneTournamentCollector:
 
     def collect_tournament_event(self, tournament_id: str, event_id: str) -> bool:
         """Collect and store tournament event data"""
+        # Uppercase the ids once here instead of for every draw and match
+        tournament_id = tournament_id.upper()
+        event_id = event_id.upper()
+        
         logging.info(f"🎾 Collecting tournament event: {tournament_id}/{event_id}")
         
         # Create tables if they don't exist
@@ -10,6 +10,8 @@ current_dir = Path(__file__).parent
 parent_dir = current_dir.parent
 sys.path.append(str(parent_dir))
 
+import asyncio
+import httpx
 import requests
 import logging
 import json
@@ -17,12 +19,18 @@ import re
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy import bindparam, create_engine, insert, select
 from models.models import (
     Base, Tournament, TournamentEvent, TournamentDraw, 
     TournamentBracketPosition, PlayerMatch
 )
 
+# Issued once per tournament during bulk collection; built once so SQLAlchemy
+# compiles it a single time and reuses the cached SQL for every call
+EVENT_IDS_QUERY = select(TournamentEvent.event_id).where(
+    TournamentEvent.tournament_id == bindparam("tournament_id")
+)
+
 class TournamentDrawVisualizationCollector:
     def __init__(self, database_url: str):
         """Initialize the tournament draw visualization collector"""
@@ -123,47 +131,31 @@ class TournamentDrawVisualizationCollector:
             )
             
             if response.status_code == 200:
-                data = response.json()
+                return self.parse_draw_visualization_response(response.json(), tournament_id, event_id)
+            else:
+                logging.error(f"API request failed with status {response.status_code}: {response.text}")
+                return {}
                 
-                if 'data' in data and 'tournamentPublicEventData' in data['data']:
-                    event_data = data['data']['tournamentPublicEventData']
-                    
-                    # Handle the case where the API returns a JSON string
-                    if isinstance(event_data, str):
-                        try:
-                            # Parse the JSON string
-                            event_data = json.loads(event_data)
-                        except json.JSONDecodeError as e:
-                            logging.error(f"Failed to parse JSON string from API: {str(e)}")
-                            return {}
-                    
-                    # Check if we have the expected structure
-                    if isinstance(event_data, dict) and 'eventData' in event_data:
-                        event_data_inner = event_data['eventData']
-                        
-                        # Extract the data we need for visualization
-                        draws_data = event_data_inner.get('drawsData', [])
-                        # Participants are at the top level of event_data, not inside eventData
-                        participants_data = event_data.get('participants', [])
-                        tournament_info = event_data_inner.get('tournamentInfo', {})
-                        event_info = event_data_inner.get('eventInfo', {})
-                        
-                        logging.info(f"Successfully fetched {len(draws_data)} draws and {len(participants_data)} participants")
-                        
-                        return {
-                            'drawsData': draws_data,
-                            'participants': participants_data,
-                            'tournamentInfo': tournament_info,
-                            'eventInfo': event_info
-                        }
-                    else:
-                        logging.warning(f"Unexpected event data structure: {type(event_data)}")
-                        if isinstance(event_data, dict):
-                            logging.info(f"Available keys: {list(event_data.keys())}")
-                        return {}
-                else:
-                    logging.warning(f"No event data found for tournament {tournament_id}, event {event_id}")
-                    return {}
+        except Exception as e:
+            logging.error(f"Error fetching draw visualization data: {str(e)}")
+            return {}
+
+    async def fetch_draw_visualization_data_async(self, client: httpx.AsyncClient, tournament_id: str, event_id: str) -> Dict[str, Any]:
+        """Async variant of fetch_draw_visualization_data using a shared httpx client"""
+        logging.info(f"Fetching draw visualization data for tournament: {tournament_id}, event: {event_id} (sending UPPERCASE to API)")
+        
+        try:
+            payload = self.create_draws_query(event_id, tournament_id)
+            
+            response = await client.post(
+                self.api_url,
+                json=payload,
+                headers=self.headers,
+                timeout=30.0
+            )
+            
+            if response.status_code == 200:
+                return self.parse_draw_visualization_response(response.json(), tournament_id, event_id)
             else:
                 logging.error(f"API request failed with status {response.status_code}: {response.text}")
                 return {}
@@ -172,6 +164,48 @@ class TournamentDrawVisualizationCollector:
             logging.error(f"Error fetching draw visualization data: {str(e)}")
             return {}
 
+    def parse_draw_visualization_response(self, data: Dict[str, Any], tournament_id: str, event_id: str) -> Dict[str, Any]:
+        """Extract the draw visualization payload from a raw API response"""
+        if 'data' in data and 'tournamentPublicEventData' in data['data']:
+            event_data = data['data']['tournamentPublicEventData']
+            
+            # Handle the case where the API returns a JSON string
+            if isinstance(event_data, str):
+                try:
+                    # Parse the JSON string
+                    event_data = json.loads(event_data)
+                except json.JSONDecodeError as e:
+                    logging.error(f"Failed to parse JSON string from API: {str(e)}")
+                    return {}
+            
+            # Check if we have the expected structure
+            if isinstance(event_data, dict) and 'eventData' in event_data:
+                event_data_inner = event_data['eventData']
+                
+                # Extract the data we need for visualization
+                draws_data = event_data_inner.get('drawsData', [])
+                # Participants are at the top level of event_data, not inside eventData
+                participants_data = event_data.get('participants', [])
+                tournament_info = event_data_inner.get('tournamentInfo', {})
+                event_info = event_data_inner.get('eventInfo', {})
+                
+                logging.info(f"Successfully fetched {len(draws_data)} draws and {len(participants_data)} participants")
+                
+                return {
+                    'drawsData': draws_data,
+                    'participants': participants_data,
+                    'tournamentInfo': tournament_info,
+                    'eventInfo': event_info
+                }
+            else:
+                logging.warning(f"Unexpected event data structure: {type(event_data)}")
+                if isinstance(event_data, dict):
+                    logging.info(f"Available keys: {list(event_data.keys())}")
+                return {}
+        else:
+            logging.warning(f"No event data found for tournament {tournament_id}, event {event_id}")
+            return {}
+
     def extract_draw_info(self, draw_data: Dict[str, Any]) -> Dict[str, Any]:
         """Extract draw information from API response"""
         draw_info = {
@@ -373,6 +407,7 @@ class TournamentDrawVisualizationCollector:
                     if len(position_assignments) > 0:
                         logging.info(f"Sample position assignment: {position_assignments[0] if position_assignments else 'None'}")
                     
+                    bracket_position_rows = []
                     for position in position_assignments:
                         participant_id_raw = position.get('participantId')
                         if not participant_id_raw:
@@ -396,21 +431,24 @@ class TournamentDrawVisualizationCollector:
                                 session, tournament_id, [participant_id]
                             )
                             
-                            bracket_position = TournamentBracketPosition(
-                                draw_id=draw_id,
-                                draw_position=draw_position,
-                                participant_id=participant_id,  # Store as lowercase
-                                participant_name=participant_info['participant_name'],
-                                participant_type=participant_info['participant_type'],
-                                team_name=participant_info['team_name'],
-                                seed_number=seed_number,
-                                player_match_id=player_match_id
-                            )
-                            session.add(bracket_position)
-                            stored_positions += 1
+                            bracket_position_rows.append({
+                                'draw_id': draw_id,
+                                'draw_position': draw_position,
+                                'participant_id': participant_id,  # Store as lowercase
+                                'participant_name': participant_info['participant_name'],
+                                'participant_type': participant_info['participant_type'],
+                                'team_name': participant_info['team_name'],
+                                'seed_number': seed_number,
+                                'player_match_id': player_match_id
+                            })
                             logging.info(f"Added bracket position for {participant_info['participant_name']} - Seed {seed_number}")
                         else:
                             logging.warning(f"Participant {participant_id} not found in participants lookup")
+                    
+                    # Insert all of the draw's positions in a single multi-row INSERT
+                    if bracket_position_rows:
+                        session.execute(insert(TournamentBracketPosition), bracket_position_rows)
+                        stored_positions += len(bracket_position_rows)
                 
                 except Exception as e:
                     logging.error(f"Error processing draw {draw_data.get('drawId', 'unknown')}: {str(e)}")
@@ -475,6 +513,62 @@ class TournamentDrawVisualizationCollector:
         finally:
             session.close()
 
+    def get_tournament_event_ids(self, tournament_id: str) -> List[str]:
+        """Get the event IDs for a tournament"""
+        session = self.Session()
+        try:
+            return list(session.scalars(EVENT_IDS_QUERY, {"tournament_id": tournament_id}))
+        finally:
+            session.close()
+
+    async def collect_draws_for_tournament_events_async(self, client: httpx.AsyncClient, tournament_id: str):
+        """Async variant of collect_draws_for_tournament_events.
+
+        API calls are awaited on the shared client; the blocking database
+        work runs in a worker thread so other tournaments keep fetching.
+        Returns True only when every event's draws were fetched and stored.
+        """
+        if not self.Session:
+            raise RuntimeError("Database not initialized")
+        
+        tournament_id_lowercase = tournament_id.lower() if tournament_id else ""
+        
+        event_ids = await asyncio.to_thread(self.get_tournament_event_ids, tournament_id_lowercase)
+        
+        if not event_ids:
+            logging.warning(f"No events found for tournament {tournament_id_lowercase}")
+            return False
+            
+        logging.info(f"Found {len(event_ids)} events for tournament {tournament_id_lowercase}")
+        
+        # A failed or empty fetch comes back as {}, so treat it like an error
+        all_events_stored = True
+        for event_id in event_ids:
+            try:
+                draws_data = await self.fetch_draw_visualization_data_async(
+                    client,
+                    tournament_id_lowercase,
+                    event_id
+                )
+                
+                if draws_data:
+                    await asyncio.to_thread(
+                        self.store_draw_visualization_data,
+                        tournament_id_lowercase,
+                        event_id,
+                        draws_data
+                    )
+                else:
+                    logging.warning(f"No draw data found for event {event_id}")
+                    all_events_stored = False
+                    
+            except Exception as e:
+                logging.error(f"Error processing event {event_id}: {str(e)}")
+                all_events_stored = False
+                continue
+        
+        return all_events_stored
+
     def run_for_specific_tournament(self, tournament_id: str):
         """Run the collector for a specific tournament ID"""
         logging.info(f"Starting draw collection for specific tournament: {tournament_id}")
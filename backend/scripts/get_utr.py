@@ -1,4 +1,3 @@
-import pickle
 import os
 import time
 import json
@@ -12,7 +11,7 @@ import requests
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
 class UTRSeleniumSession:
-    def __init__(self, cookies_file='utr_cookies.pkl'):
+    def __init__(self, cookies_file='utr_cookies.json'):
         self.cookies_file = cookies_file
         self.session = requests.Session()
         self.session.headers.update({
@@ -138,8 +137,8 @@ class UTRSeleniumSession:
                 print("WARNING: JWT cookie not found!")
                 
             # Save cookies to file
-            with open(self.cookies_file, 'wb') as f:
-                pickle.dump(cookie_dict, f)
+            with open(self.cookies_file, 'w', encoding='utf-8') as f:
+                json.dump(cookie_dict, f)
             
             print("Cookies saved to file!")
             
@@ -229,9 +228,16 @@ class UTRSeleniumSession:
                         players.append(hit['source'])
                 
                 print(f"Search successful, found {len(players)} players")
+                # Use the total reported by the API (not the size of this page)
+                # so callers know when they have fetched everything. None means
+                # the API did not report a usable total; a real 0 is kept.
+                total_count = next(
+                    (data[key] for key in ('totalCount', 'total') if data.get(key) is not None),
+                    None
+                )
                 return {
                     'players': players,
-                    'totalCount': len(data['hits'])
+                    'totalCount': total_count if isinstance(total_count, int) else None
                 }
             else:
                 print("Warning: 'hits' key not found in response")
@@ -287,6 +293,12 @@ class UTRSeleniumSession:
             all_players.extend(players)
             print(f"Retrieved {len(players)} players (total: {len(all_players)})")
             
+            # Stop as soon as we have every player matching the query
+            total_count = data.get('totalCount')
+            if total_count is not None and len(all_players) >= total_count:
+                print("Retrieved all matching players")
+                break
+            
             # If we got fewer players than requested, we've reached the end
             if len(players) < batch_size:
                 print("Reached end of results")
@@ -409,8 +421,8 @@ if __name__ == "__main__":
     cookies_exist = False
     if os.path.exists(utr.cookies_file):
         try:
-            with open(utr.cookies_file, 'rb') as f:
-                cookies = pickle.load(f)
+            with open(utr.cookies_file, 'r', encoding='utf-8') as f:
+                cookies = json.load(f)
                 utr.session.cookies.update(cookies)
                 
             # Test if cookies work with player search API
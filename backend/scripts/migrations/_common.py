@@ -0,0 +1,104 @@
+# migrations/_common.py
+"""
+Helpers shared by the migrations: logging setup, a single engine per
+database URL, index creation, and the DDL runner used by the rollbacks.
+"""
+
+import functools
+import logging
+import os
+from psycopg2.errors import DuplicateTable
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.pool import NullPool
+
+def setup_logging(log_file: str):
+    """Set up logging for a migration, writing to log_file and the console"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_file),
+            logging.StreamHandler()
+        ]
+    )
+
+@functools.lru_cache(maxsize=1)
+def get_engine(database_url: str):
+    """Return the engine for database_url, creating it on first use"""
+    # TCP keepalives stop idle pooled connections to the remote database from
+    # being dropped between migration steps; local SQLite runs don't need them
+    connect_args = {}
+    if database_url.startswith("postgresql"):
+        connect_args = {"keepalives": 1, "keepalives_idle": 30}
+    return create_engine(
+        database_url,
+        pool_pre_ping=True,
+        pool_size=4,
+        connect_args=connect_args,
+    )
+
+def index_name(index_sql: str) -> str:
+    """Name of the index created by a CREATE INDEX statement"""
+    tokens = index_sql.split()
+    return tokens[tokens.index("ON") - 1]
+
+def apply_indexes(engine, index_statements):
+    """Run CREATE INDEX CONCURRENTLY statements on one autocommit connection.
+
+    CONCURRENTLY cannot run inside a transaction, and two concurrent builds on
+    the same table wait on each other, so the statements run one after another.
+    Indexes that already exist are looked up once and skipped without a round
+    trip each.
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        existing = set(conn.execute(
+            text("SELECT indexname FROM pg_indexes WHERE schemaname = current_schema()")
+        ).scalars())
+        
+        for index_sql in index_statements:
+            name = index_name(index_sql)
+            if name in existing:
+                logging.info(f"Index already exists: {name}")
+                continue
+            try:
+                conn.execute(text(index_sql))
+                logging.info(f"Created index: {name}")
+            except ProgrammingError as e:
+                if not isinstance(e.orig, DuplicateTable):
+                    raise
+                logging.info(f"Index already exists: {name}")
+
+ROLLBACK_TIMEOUTS = [
+    "SET LOCAL lock_timeout = '10s';",
+    "SET LOCAL statement_timeout = '60s';",
+]
+
+def run_ddl(description: str, statements):
+    """Run DDL statements against DATABASE_URL as one script in one transaction.
+
+    Rollbacks are one-shot, so the engine uses NullPool and is disposed as
+    soon as the script has run.
+    """
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        raise ValueError("DATABASE_URL environment variable not set")
+    
+    # Fail within seconds, not minutes, when the database can't be reached
+    engine = create_engine(database_url, poolclass=NullPool, connect_args={"connect_timeout": 5})
+    try:
+        logging.warning(f"Rolling back {description}...")
+        
+        with engine.begin() as conn:
+            # Bound how long a DROP can wait for its ACCESS EXCLUSIVE lock behind
+            # active readers; SET LOCAL keeps the limits to this transaction and
+            # rides along in the same round trip as the DDL
+            conn.exec_driver_sql("\n".join(ROLLBACK_TIMEOUTS + list(statements)))
+        
+        logging.info(f"{description.capitalize()} rolled back successfully")
+        
+    except Exception as e:
+        logging.error(f"Error during rollback: {str(e)}")
+        raise
+    finally:
+        engine.dispose()
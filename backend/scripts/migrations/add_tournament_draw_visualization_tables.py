@@ -6,9 +6,13 @@ Run this from the migrations directory: python add_tournament_draw_visualization
 
 import os
 import sys
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
-from sqlalchemy import create_engine, text
+import httpx
+from sqlalchemy import column, delete, exists, select, table, text
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime, timedelta
 
@@ -35,36 +39,49 @@ if not models_file.exists():
     sys.exit(1)
 
 try:
-    from models.models import Base, Tournament, TournamentEvent
+    from models.models import Base, Tournament, TournamentEvent, TournamentDraw
+    from scripts.migrations._common import apply_indexes, get_engine, setup_logging
+    from scripts.migrations.rate_limit import TokenBucket
     print("✅ Successfully imported models")
 except ImportError as e:
     print(f"❌ Failed to import models: {e}")
     sys.exit(1)
 
-def setup_logging():
-    """Set up logging for migration"""
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler('tournament_draw_visualization_migration.log'),
-            logging.StreamHandler()
-        ]
-    )
+# Key for this migration's rows in the migration_progress checkpoint table
+PROGRESS_MIGRATION_NAME = "draws_v1"
+
+migration_progress = table("migration_progress", column("migration"), column("key"))
+
+# Run once per tournament; built once at import so every call reuses the
+# same statement object and its cached compiled form
+MARK_COLLECTED_SQL = text("""
+    INSERT INTO migration_progress (migration, key)
+    VALUES (:migration, :key)
+    ON CONFLICT DO NOTHING;
+""")
+
+def is_seed_run() -> bool:
+    """Whether this run is a first-time bulk seed (MIGRATION_SEED=1)"""
+    return os.getenv('MIGRATION_SEED') == '1'
 
-def create_tournament_draw_visualization_tables(database_url: str):
+def create_tournament_draw_visualization_tables(engine):
     """Create the tournament draw visualization tables"""
     try:
-        engine = create_engine(database_url)
-        
         logging.info("Creating tournament draw visualization tables...")
         
-        with engine.connect() as conn:
+        # Both CREATE TABLE statements go to the server as one multi-statement
+        # string: a single round-trip and a single commit
+        with engine.begin() as conn:
+            # Foreign keys are checked once at commit (DEFERRABLE INITIALLY DEFERRED)
+            # so a draw and its positions can be bulk loaded in any order within
+            # one transaction
+            
             # Create tournament_draws table
-            draws_sql = text("""
+            draws_sql = """
                 CREATE TABLE IF NOT EXISTS tournament_draws (
                     draw_id VARCHAR PRIMARY KEY,
-                    tournament_id VARCHAR REFERENCES tournaments(tournament_id),
+                    tournament_id VARCHAR REFERENCES tournaments(tournament_id)
+                        ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
                     event_id VARCHAR,
                     
                     -- Draw information for visualization
@@ -85,16 +102,19 @@ def create_tournament_draw_visualization_tables(database_url: str):
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 );
-            """)
+            """
             
-            conn.execute(draws_sql)
-            conn.commit()
-            
-            # Create tournament_bracket_positions table
-            positions_sql = text("""
-                CREATE TABLE IF NOT EXISTS tournament_bracket_positions (
+            # Create tournament_bracket_positions table. For a first-time seed
+            # (MIGRATION_SEED=1) it starts UNLOGGED so the bulk load skips WAL;
+            # run_migration switches it to LOGGED once collection finishes.
+            # An unlogged table is emptied after a crash, so never seed this way
+            # on a table that already holds data.
+            table_kind = "UNLOGGED TABLE" if is_seed_run() else "TABLE"
+            positions_sql = f"""
+                CREATE {table_kind} IF NOT EXISTS tournament_bracket_positions (
                     id SERIAL PRIMARY KEY,
-                    draw_id VARCHAR REFERENCES tournament_draws(draw_id),
+                    draw_id VARCHAR REFERENCES tournament_draws(draw_id)
+                        ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
                     
                     -- Position in the bracket
                     draw_position INTEGER,
@@ -112,7 +132,8 @@ def create_tournament_draw_visualization_tables(database_url: str):
                     seed_number INTEGER,
                     
                     -- Match linking to existing system
-                    player_match_id INTEGER REFERENCES player_matches(id),
+                    player_match_id INTEGER REFERENCES player_matches(id)
+                        ON DELETE SET NULL DEFERRABLE INITIALLY DEFERRED,
                     
                     -- Position status
                     is_bye BOOLEAN DEFAULT FALSE,
@@ -123,57 +144,84 @@ def create_tournament_draw_visualization_tables(database_url: str):
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 );
-            """)
+            """
             
-            conn.execute(positions_sql)
-            conn.commit()
+            conn.exec_driver_sql(draws_sql + positions_sql)
             
             logging.info("Tournament draw visualization tables created successfully")
         
-        return engine
-        
     except Exception as e:
         logging.error(f"Error creating tournament draw visualization tables: {str(e)}")
         raise
 
-def normalize_existing_ids(database_url: str):
-    """Normalize existing IDs to lowercase in relevant tables"""
+def create_migration_progress_table(engine):
+    """Create the checkpoint table that lets an interrupted data collection resume"""
     try:
-        engine = create_engine(database_url)
+        logging.info("Creating migration progress table...")
+        
+        with engine.begin() as conn:
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS migration_progress (
+                    migration TEXT,
+                    key TEXT,
+                    done_at TIMESTAMP DEFAULT now(),
+                    PRIMARY KEY (migration, key)
+                );
+            """))
+        
+        logging.info("Migration progress table created successfully")
         
+    except Exception as e:
+        logging.error(f"Error creating migration progress table: {str(e)}")
+        raise
+
+def mark_tournament_collected(engine, tournament_id: str):
+    """Record that a tournament's draws were collected so reruns skip it"""
+    with engine.begin() as conn:
+        conn.execute(
+            MARK_COLLECTED_SQL,
+            {"migration": PROGRESS_MIGRATION_NAME, "key": tournament_id}
+        )
+
+def clear_collection_checkpoints(engine):
+    """Drop this migration's checkpoints once a collection run has finished.
+
+    Checkpoints only exist to resume an interrupted run; keeping them would
+    hide tournaments whose draws later go stale from every future refresh.
+    """
+    with engine.begin() as conn:
+        conn.execute(
+            delete(migration_progress).where(migration_progress.c.migration == PROGRESS_MIGRATION_NAME)
+        )
+
+def normalize_existing_ids(engine):
+    """Normalize existing IDs to lowercase in relevant tables"""
+    try:
         logging.info("Normalizing existing IDs to lowercase...")
         
-        with engine.connect() as conn:
-            # Update tournament_draws table if it has data
-            normalize_draws_sql = text("""
+        # Both tables in one statement: a single commit, and the foreign key
+        # from positions to draws is only checked once both sides are lowercase.
+        # Rows that are already lowercase are left alone to avoid no-op writes.
+        normalize_sql = text("""
+            WITH normalized_draws AS (
                 UPDATE tournament_draws SET
                     draw_id = LOWER(draw_id),
                     tournament_id = LOWER(tournament_id),
                     event_id = LOWER(event_id)
-                WHERE draw_id IS NOT NULL;
-            """)
-            
-            # Update tournament_bracket_positions table if it has data
-            normalize_positions_sql = text("""
-                UPDATE tournament_bracket_positions SET
-                    draw_id = LOWER(draw_id),
-                    participant_id = LOWER(participant_id)
-                WHERE participant_id IS NOT NULL;
-            """)
-            
-            try:
-                conn.execute(normalize_draws_sql)
-                conn.commit()
-                logging.info("Normalized tournament_draws IDs to lowercase")
-            except Exception as e:
-                logging.warning(f"Could not normalize tournament_draws (table may be empty): {str(e)}")
-            
-            try:
-                conn.execute(normalize_positions_sql)
-                conn.commit()
-                logging.info("Normalized tournament_bracket_positions IDs to lowercase")
-            except Exception as e:
-                logging.warning(f"Could not normalize tournament_bracket_positions (table may be empty): {str(e)}")
+                WHERE draw_id <> LOWER(draw_id)
+                   OR tournament_id <> LOWER(tournament_id)
+                   OR event_id <> LOWER(event_id)
+                RETURNING 1
+            )
+            UPDATE tournament_bracket_positions SET
+                draw_id = LOWER(draw_id),
+                participant_id = LOWER(participant_id)
+            WHERE participant_id <> LOWER(participant_id)
+               OR draw_id <> LOWER(draw_id);
+        """)
+        
+        with engine.begin() as conn:
+            conn.execute(normalize_sql)
         
         logging.info("ID normalization completed")
         
@@ -181,45 +229,62 @@ def normalize_existing_ids(database_url: str):
         logging.error(f"Error normalizing IDs: {str(e)}")
         logging.warning("Continuing migration despite ID normalization issues")
 
-def add_indexes(database_url: str):
+def add_indexes(engine):
     """Add database indexes for better query performance"""
     try:
-        engine = create_engine(database_url)
-        
         logging.info("Adding database indexes...")
         
-        with engine.connect() as conn:
-            indexes = [
-                "CREATE INDEX IF NOT EXISTS idx_tournament_draws_tournament_id ON tournament_draws(tournament_id);",
-                "CREATE INDEX IF NOT EXISTS idx_tournament_draws_event_id ON tournament_draws(event_id);",
-                "CREATE INDEX IF NOT EXISTS idx_tournament_draws_event_type ON tournament_draws(event_type);",
-                "CREATE INDEX IF NOT EXISTS idx_tournament_draws_gender ON tournament_draws(gender);",
-                "CREATE INDEX IF NOT EXISTS idx_tournament_draws_completed ON tournament_draws(draw_completed);",
-                "CREATE INDEX IF NOT EXISTS idx_tournament_draws_active ON tournament_draws(draw_active);",
-                "CREATE INDEX IF NOT EXISTS idx_tournament_bracket_positions_draw_id ON tournament_bracket_positions(draw_id);",
-                "CREATE INDEX IF NOT EXISTS idx_tournament_bracket_positions_participant_id ON tournament_bracket_positions(participant_id);",
-                "CREATE INDEX IF NOT EXISTS idx_tournament_bracket_positions_draw_position ON tournament_bracket_positions(draw_position);",
-                "CREATE INDEX IF NOT EXISTS idx_tournament_bracket_positions_round_number ON tournament_bracket_positions(round_number);",
-                "CREATE INDEX IF NOT EXISTS idx_tournament_bracket_positions_team_name ON tournament_bracket_positions(team_name);",
-                "CREATE INDEX IF NOT EXISTS idx_tournament_bracket_positions_player_match_id ON tournament_bracket_positions(player_match_id);",
-                "CREATE INDEX IF NOT EXISTS idx_tournament_bracket_positions_seed_number ON tournament_bracket_positions(seed_number);",
-                "CREATE INDEX IF NOT EXISTS idx_tournament_draws_tournament_event ON tournament_draws(tournament_id, event_type);",
-                "CREATE INDEX IF NOT EXISTS idx_tournament_draws_tournament_gender ON tournament_draws(tournament_id, gender);",
-                "CREATE INDEX IF NOT EXISTS idx_tournament_bracket_positions_draw_round ON tournament_bracket_positions(draw_id, round_number);",
-                "CREATE INDEX IF NOT EXISTS idx_tournament_bracket_positions_draw_position_combo ON tournament_bracket_positions(draw_id, draw_position);",
-                "CREATE INDEX IF NOT EXISTS idx_tournament_draws_updated_at_api ON tournament_draws(updated_at_api);",
-                "CREATE INDEX IF NOT EXISTS idx_tournament_bracket_positions_is_bye ON tournament_bracket_positions(is_bye);",
-                "CREATE INDEX IF NOT EXISTS idx_tournament_bracket_positions_is_winner ON tournament_bracket_positions(is_winner);",
+        # No standalone tournament_id / draw_id indexes: lookups on those
+        # columns use the left prefix of the (tournament_id, ...) and
+        # (draw_id, ...) composites below
+        indexes_by_table = {
+            "tournament_draws": [
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tournament_draws_event_id ON tournament_draws(event_id);",
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tournament_draws_tournament_event ON tournament_draws(tournament_id, event_type);",
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tournament_draws_tournament_gender ON tournament_draws(tournament_id, gender);",
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tournament_draws_updated_at_api ON tournament_draws(updated_at_api);",
+                # Partial index instead of a low-selectivity boolean index
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tournament_draws_active_by_tournament ON tournament_draws(tournament_id) WHERE draw_active = true;",
+            ],
+            "tournament_bracket_positions": [
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tournament_bracket_positions_participant_id ON tournament_bracket_positions(participant_id);",
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tournament_bracket_positions_draw_position ON tournament_bracket_positions(draw_position);",
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tournament_bracket_positions_round_number ON tournament_bracket_positions(round_number);",
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tournament_bracket_positions_team_name ON tournament_bracket_positions(team_name);",
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tournament_bracket_positions_player_match_id ON tournament_bracket_positions(player_match_id);",
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tournament_bracket_positions_seed_number ON tournament_bracket_positions(seed_number);",
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tournament_bracket_positions_draw_round ON tournament_bracket_positions(draw_id, round_number);",
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tournament_bracket_positions_draw_position_combo ON tournament_bracket_positions(draw_id, draw_position);",
+                # Winners per draw, without indexing every losing position
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tournament_bracket_positions_winners ON tournament_bracket_positions(draw_id) WHERE is_winner = true;",
+            ],
+        }
+        
+        # Low-selectivity boolean/enum indexes created by earlier versions of
+        # this migration; they cost a btree update per insert and are never used
+        obsolete_indexes = [
+            "DROP INDEX CONCURRENTLY IF EXISTS idx_tournament_draws_event_type;",
+            "DROP INDEX CONCURRENTLY IF EXISTS idx_tournament_draws_gender;",
+            "DROP INDEX CONCURRENTLY IF EXISTS idx_tournament_draws_completed;",
+            "DROP INDEX CONCURRENTLY IF EXISTS idx_tournament_draws_active;",
+            "DROP INDEX CONCURRENTLY IF EXISTS idx_tournament_bracket_positions_is_bye;",
+            "DROP INDEX CONCURRENTLY IF EXISTS idx_tournament_bracket_positions_is_winner;",
+            # Covered by the left prefix of a composite index
+            "DROP INDEX CONCURRENTLY IF EXISTS idx_tournament_draws_tournament_id;",
+            "DROP INDEX CONCURRENTLY IF EXISTS idx_tournament_bracket_positions_draw_id;",
+        ]
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            for drop_sql in obsolete_indexes:
+                conn.execute(text(drop_sql))
+        
+        # Build the indexes of different tables in parallel
+        with ThreadPoolExecutor(max_workers=len(indexes_by_table)) as executor:
+            futures = [
+                executor.submit(apply_indexes, engine, index_statements)
+                for index_statements in indexes_by_table.values()
             ]
-            
-            for index_sql in indexes:
-                try:
-                    conn.execute(text(index_sql))
-                    conn.commit()
-                    logging.info(f"Created index: {index_sql.split()[-1]}")
-                except Exception as e:
-                    logging.warning(f"Index may already exist or failed to create: {str(e)}")
-                    continue
+            for future in futures:
+                future.result()
         
         logging.info("Database indexes added successfully")
         
@@ -227,6 +292,35 @@ def add_indexes(database_url: str):
         logging.error(f"Error adding indexes: {str(e)}")
         raise
 
+async def collect_draws_concurrently(collector, tournaments, max_concurrency: int = 8):
+    """Collect draws for many tournaments with a bounded number of requests in flight.
+
+    Returns one result per tournament, in order: True when every event was
+    stored, False when some event failed or came back empty, or the raised
+    exception instead of aborting the remaining tournaments. Only fully
+    collected tournaments are checkpointed, so the rest are retried on resume.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    rate_limiter = TokenBucket(rate=4.0, burst=10)
+    
+    async with httpx.AsyncClient(verify=False) as client:
+        async def collect(tournament_id, tournament_name, start_date):
+            async with semaphore:
+                # Normalize tournament_id to lowercase for consistency
+                tournament_id_normalized = tournament_id.lower() if tournament_id else ""
+                
+                await rate_limiter.acquire_async()
+                logging.info(f"Collecting draw visualization for: {tournament_name} ({tournament_id_normalized}) - {start_date}")
+                complete = await collector.collect_draws_for_tournament_events_async(client, tournament_id_normalized)
+                if complete:
+                    await asyncio.to_thread(mark_tournament_collected, collector.engine, tournament_id)
+                return complete
+        
+        return await asyncio.gather(
+            *(collect(*tournament) for tournament in tournaments),
+            return_exceptions=True
+        )
+
 def run_initial_data_collection(database_url: str):
     """Run initial collection of tournament draw visualization data from API for ALL tournaments"""
     try:
@@ -242,57 +336,67 @@ def run_initial_data_collection(database_url: str):
             
         session = collector.Session()
         try:
-            # Get ALL tournaments that have events (no date filter)
-            tournaments_with_events = session.query(
-                Tournament.tournament_id, Tournament.name, Tournament.start_date_time
-            ).join(
-                TournamentEvent, Tournament.tournament_id == TournamentEvent.tournament_id
-            ).filter(
-                Tournament.is_cancelled == False
-            ).order_by(Tournament.start_date_time.desc()).distinct().all()
+            # Skip tournaments whose draws are already stored, unless one of
+            # them is still in progress and hasn't been refreshed in a week
+            stale_cutoff = datetime.utcnow() - timedelta(days=7)
+            up_to_date_draws = exists().where(
+                TournamentDraw.tournament_id == Tournament.tournament_id
+            ).where(
+                ~exists().where(
+                    TournamentDraw.tournament_id == Tournament.tournament_id,
+                    TournamentDraw.draw_completed.is_not(True),
+                    TournamentDraw.updated_at < stale_cutoff
+                ).correlate(Tournament)
+            )
             
-            logging.info(f"Found {len(tournaments_with_events)} total tournaments with events for draw visualization collection")
+            # Get ALL tournaments that have events (no date filter) and still
+            # need draws, streamed from a server-side cursor instead of loaded up front
+            # EXISTS is a semi-join: no duplicate rows per event, so no DISTINCT sort
+            stmt = select(
+                Tournament.tournament_id, Tournament.name, Tournament.start_date_time
+            ).where(
+                Tournament.is_cancelled.is_(False),
+                exists().where(TournamentEvent.tournament_id == Tournament.tournament_id),
+                ~up_to_date_draws,
+                # Resume after an interrupted run: skip tournaments already checkpointed.
+                # Checkpoints are cleared when a run completes, so stale draws still refresh
+                ~exists().where(
+                    migration_progress.c.migration == PROGRESS_MIGRATION_NAME,
+                    migration_progress.c.key == Tournament.tournament_id
+                )
+            ).order_by(Tournament.start_date_time.desc())
             
-            if not tournaments_with_events:
-                logging.info("No tournaments found, skipping data collection")
-                return
+            tournaments_with_events = iter(session.execute(stmt.execution_options(yield_per=500)))
             
-            success_count = 0
+            total_tournaments = 0
             error_count = 0
+            batch_size = 500
             
-            # Process tournaments in batches to avoid overwhelming the API
-            batch_size = 50
-            total_tournaments = len(tournaments_with_events)
-            
-            for i in range(0, total_tournaments, batch_size):
-                batch = tournaments_with_events[i:i + batch_size]
-                batch_num = (i // batch_size) + 1
-                total_batches = (total_tournaments + batch_size - 1) // batch_size
+            while True:
+                batch = list(islice(tournaments_with_events, batch_size))
+                if not batch:
+                    break
                 
-                logging.info(f"Processing batch {batch_num}/{total_batches} ({len(batch)} tournaments)")
+                total_tournaments += len(batch)
+                logging.info(f"Processing {len(batch)} tournaments with events (total so far: {total_tournaments})")
                 
-                for tournament_id, tournament_name, start_date in batch:
-                    try:
-                        # Normalize tournament_id to lowercase for consistency
-                        tournament_id_normalized = tournament_id.lower() if tournament_id else ""
-                        
-                        logging.info(f"Collecting draw visualization for: {tournament_name} ({tournament_id_normalized}) - {start_date}")
-                        collector.collect_draws_for_tournament_events(tournament_id_normalized)
-                        success_count += 1
-                        
-                        # Add small delay between tournaments to be respectful to the API
-                        import time
-                        time.sleep(1)
-                        
-                    except Exception as e:
-                        logging.warning(f"Failed to collect draw visualization for {tournament_id}: {str(e)}")
+                results = asyncio.run(collect_draws_concurrently(collector, batch))
+                for (tournament_id, _, _), result in zip(batch, results):
+                    if isinstance(result, Exception):
+                        logging.warning(f"Failed to collect draw visualization for {tournament_id}: {str(result)}")
                         error_count += 1
-                        continue
-                
-                # Longer delay between batches
-                if i + batch_size < total_tournaments:
-                    logging.info(f"Completed batch {batch_num}/{total_batches}. Waiting 10 seconds before next batch...")
-                    time.sleep(10)
+                    elif not result:
+                        logging.warning(f"Draw visualization for {tournament_id} is incomplete; it will be retried")
+                        error_count += 1
+            
+            # The run reached the end, so the next one starts from a clean slate
+            clear_collection_checkpoints(collector.engine)
+            
+            if not total_tournaments:
+                logging.info("No tournaments found, skipping data collection")
+                return
+            
+            success_count = total_tournaments - error_count
             
             logging.info(f"Comprehensive draw visualization collection completed: {success_count} successful, {error_count} failed out of {total_tournaments} total tournaments")
                     
@@ -307,6 +411,13 @@ def run_initial_data_collection(database_url: str):
         logging.error(f"Error in comprehensive tournament draw visualization collection: {str(e)}")
         logging.warning("Continuing with migration despite collection error")
 
+def run_data_collection_step(database_url: str):
+    """Run the initial data collection without letting it fail the migration"""
+    try:
+        run_initial_data_collection(database_url)
+    except Exception as e:
+        logging.warning(f"Tournament draw visualization collection failed, but migration can continue: {str(e)}")
+
 def run_migration():
     """Run the complete migration"""
     try:
@@ -323,20 +434,37 @@ def run_migration():
         
         logging.info("Starting tournament draw visualization tables migration...")
         
-        # Step 1: Create tournament draw visualization tables
-        engine = create_tournament_draw_visualization_tables(database_url)
-        
-        # Step 2: Normalize existing IDs to lowercase
-        normalize_existing_ids(database_url)
-        
-        # Step 3: Add database indexes
-        add_indexes(database_url)
-        
-        # Step 4: Run initial data collection for ALL tournaments (no hardcoded IDs)
+        # One engine (and TLS connection pool) shared by every step
+        engine = get_engine(database_url)
         try:
-            run_initial_data_collection(database_url)
-        except Exception as e:
-            logging.warning(f"Tournament draw visualization collection failed, but migration can continue: {str(e)}")
+            # Step 1: Create tournament draw visualization tables and the
+            # checkpoint table for resumable data collection
+            create_tournament_draw_visualization_tables(engine)
+            create_migration_progress_table(engine)
+            
+            if is_seed_run():
+                # First-time seed: load the data before any index exists, then
+                # build each index in one pass instead of updating it per row
+                run_data_collection_step(database_url)
+                
+                # Make the seeded bracket positions table crash-safe again
+                with engine.begin() as conn:
+                    conn.execute(text("ALTER TABLE tournament_bracket_positions SET LOGGED;"))
+                logging.info("Switched tournament_bracket_positions to LOGGED")
+                
+                normalize_existing_ids(engine)
+                add_indexes(engine)
+            else:
+                # Step 2: Normalize existing IDs to lowercase
+                normalize_existing_ids(engine)
+                
+                # Step 3: Add database indexes
+                add_indexes(engine)
+                
+                # Step 4: Run initial data collection for ALL tournaments (no hardcoded IDs)
+                run_data_collection_step(database_url)
+        finally:
+            engine.dispose()
         
         logging.info("Tournament draw visualization tables migration completed successfully!")
         
@@ -345,5 +473,5 @@ def run_migration():
         raise
 
 if __name__ == "__main__":
-    setup_logging()
+    setup_logging('tournament_draw_visualization_migration.log')
     run_migration()
\ No newline at end of file
@@ -7,8 +7,10 @@ Run this from the backend directory: python migrations/add_tournament_players_ta
 import os
 import sys
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
 from pathlib import Path
-from sqlalchemy import create_engine, text
+from sqlalchemy import select, text
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime, timedelta
 
@@ -18,23 +20,12 @@ sys.path.insert(0, str(backend_root))
 
 # Now import from your models
 from models.models import Base
+from scripts.migrations._common import apply_indexes, get_engine, setup_logging
+from scripts.migrations.rate_limit import TokenBucket
 
-def setup_logging():
-    """Set up logging for migration"""
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler('tournament_players_migration.log'),
-            logging.StreamHandler()
-        ]
-    )
-
-def create_tournament_players_table(database_url: str):
+def create_tournament_players_table(engine):
     """Create the tournament_players table"""
     try:
-        engine = create_engine(database_url)
-        
         logging.info("Creating tournament_players table...")
         
         with engine.connect() as conn:
@@ -78,45 +69,34 @@ def create_tournament_players_table(database_url: str):
             conn.commit()
             logging.info("Tournament players table created successfully")
         
-        return engine
-        
     except Exception as e:
         logging.error(f"Error creating tournament registrations table: {str(e)}")
         raise
 
-def add_indexes(database_url: str):
+def add_indexes(engine):
     """Add database indexes for better query performance"""
     try:
-        engine = create_engine(database_url)
-        
         logging.info("Adding database indexes...")
         
-        with engine.connect() as conn:
-            indexes = [
-                # Tournament players indexes
-                "CREATE INDEX IF NOT EXISTS idx_tournament_players_tournament_id ON tournament_players(tournament_id);",
-                "CREATE INDEX IF NOT EXISTS idx_tournament_players_player_id ON tournament_players(player_id);",
-                "CREATE INDEX IF NOT EXISTS idx_tournament_players_gender ON tournament_players(gender);",
-                "CREATE INDEX IF NOT EXISTS idx_tournament_players_state ON tournament_players(state);",
-                "CREATE INDEX IF NOT EXISTS idx_tournament_players_events_participating ON tournament_players(events_participating);",
-                "CREATE INDEX IF NOT EXISTS idx_tournament_players_player2_id ON tournament_players(player2_id);",
-                "CREATE INDEX IF NOT EXISTS idx_tournament_players_player_name ON tournament_players(player_name);",
-                "CREATE INDEX IF NOT EXISTS idx_tournament_players_created_at ON tournament_players(created_at);",
-                
-                # Composite indexes for common queries
-                "CREATE INDEX IF NOT EXISTS idx_tournament_players_tournament_gender ON tournament_players(tournament_id, gender);",
-                "CREATE INDEX IF NOT EXISTS idx_tournament_players_tournament_events ON tournament_players(tournament_id, events_participating);",
-                "CREATE INDEX IF NOT EXISTS idx_tournament_players_player_tournament ON tournament_players(player_id, tournament_id);",
-            ]
+        indexes = [
+            # Tournament players indexes
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tournament_players_tournament_id ON tournament_players(tournament_id);",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tournament_players_player_id ON tournament_players(player_id);",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tournament_players_gender ON tournament_players(gender);",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tournament_players_state ON tournament_players(state);",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tournament_players_events_participating ON tournament_players(events_participating);",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tournament_players_player2_id ON tournament_players(player2_id);",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tournament_players_player_name ON tournament_players(player_name);",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tournament_players_created_at ON tournament_players(created_at);",
             
-            for index_sql in indexes:
-                try:
-                    conn.execute(text(index_sql))
-                    conn.commit()
-                    logging.info(f"Created index: {index_sql}")
-                except Exception as e:
-                    logging.warning(f"Index may already exist or failed to create: {index_sql} - {str(e)}")
-                    continue
+            # Composite indexes for common queries
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tournament_players_tournament_gender ON tournament_players(tournament_id, gender);",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tournament_players_tournament_events ON tournament_players(tournament_id, events_participating);",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tournament_players_player_tournament ON tournament_players(player_id, tournament_id);",
+        ]
+        
+        # CONCURRENTLY keeps the table writable while the indexes build
+        apply_indexes(engine, indexes)
         
         logging.info("Database indexes added successfully")
         
@@ -156,32 +136,46 @@ def run_initial_data_collection(database_url: str):
             # Get tournaments from the last 360 days that haven't been cancelled
             cutoff_date = datetime.now() - timedelta(days=360)
             
-            tournaments_in_range = session.query(Tournament.tournament_id, Tournament.name, Tournament.start_date_time).filter(
-                Tournament.is_cancelled == False,
+            # Stream rows from a server-side cursor rather than loading them all
+            stmt = select(Tournament.tournament_id, Tournament.name, Tournament.start_date_time).where(
+                Tournament.is_cancelled.is_(False),
                 Tournament.start_date_time >= cutoff_date
             ).order_by(
                 Tournament.start_date_time.desc()
-            ).all()
-            
-            logging.info(f"Found {len(tournaments_in_range)} tournaments from last 360 days for player collection")
+            )
+            tournaments_in_range = iter(session.execute(stmt.execution_options(yield_per=500)))
             
             success_count = 0
             error_count = 0
+            rate_limiter = TokenBucket(rate=4.0, burst=10)
+            
+            def collect_one(tournament_id, tournament_name, start_date):
+                # Pace API requests across all workers
+                rate_limiter.acquire()
+                logging.info(f"Collecting players for: {tournament_name} ({tournament_id}) - {start_date}")
+                collector.collect_players_for_tournament(tournament_id)
             
-            for tournament_id, tournament_name, start_date in tournaments_in_range:
-                try:
-                    logging.info(f"Collecting players for: {tournament_name} ({tournament_id}) - {start_date}")
-                    collector.collect_players_for_tournament(tournament_id)
-                    success_count += 1
-                    # Add a small delay to be respectful to the API
-                    import time
-                    time.sleep(1)  # 1 second delay between requests
-                except Exception as e:
-                    logging.warning(f"Failed to collect players for {tournament_id}: {str(e)}")
-                    error_count += 1
-                    continue
+            # Each tournament is independent; the collector opens its own
+            # session per store, so workers share only the engine's pool
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                while True:
+                    batch = list(islice(tournaments_in_range, 500))
+                    if not batch:
+                        break
+                    
+                    futures = {
+                        executor.submit(collect_one, *tournament): tournament[0]
+                        for tournament in batch
+                    }
+                    for future in as_completed(futures):
+                        try:
+                            future.result()
+                            success_count += 1
+                        except Exception as e:
+                            logging.warning(f"Failed to collect players for {futures[future]}: {str(e)}")
+                            error_count += 1
             
-            logging.info(f"Player collection completed: {success_count} successful, {error_count} failed")
+            logging.info(f"Player collection completed for tournaments from last 360 days: {success_count} successful, {error_count} failed")
                     
         except Exception as e:
             logging.warning(f"Error querying tournaments from last 360 days: {str(e)}")
@@ -206,11 +200,15 @@ def run_migration():
         
         logging.info("Starting tournament players table migration...")
         
-        # Step 1: Create tournament registrations table
-        engine = create_tournament_players_table(database_url)
-        
-        # Step 2: Add database indexes
-        add_indexes(database_url)
+        engine = get_engine(database_url)
+        try:
+            # Step 1: Create tournament registrations table
+            create_tournament_players_table(engine)
+            
+            # Step 2: Add database indexes
+            add_indexes(engine)
+        finally:
+            engine.dispose()
         
         # Step 3: Run initial data collection (optional)
         try:
@@ -225,5 +223,5 @@ def run_migration():
         raise
 
 if __name__ == "__main__":
-    setup_logging()
+    setup_logging('tournament_players_migration.log')
     run_migration()
\ No newline at end of file
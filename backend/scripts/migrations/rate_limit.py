@@ -0,0 +1,43 @@
+# migrations/rate_limit.py
+"""
+Token-bucket rate limiter shared by the migrations' initial data collection.
+Callers only wait when the bucket is empty, so fast API responses are not
+padded with a fixed sleep.
+"""
+
+import asyncio
+import threading
+import time
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        """Allow `rate` requests per second on average, with bursts of up to `burst`"""
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _reserve(self) -> float:
+        """Take a token and return how many seconds to wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+    
+    def acquire(self):
+        """Block until a request is allowed"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+    
+    async def acquire_async(self):
+        """Wait, without blocking the event loop, until a request is allowed"""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
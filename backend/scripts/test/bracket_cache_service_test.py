@@ -7,6 +7,7 @@ All tournament data is captured in these two tables with no redundancy
 
 import sys
 import os
+import re
 from pathlib import Path
 
 # Add the parent directory to Python path so we can import models
@@ -15,10 +16,25 @@ parent_dir = current_dir.parent
 sys.path.append(str(parent_dir))
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import InsecureRequestWarning
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
+import psycopg2
+from psycopg2.extras import execute_values
+
+# orjson parses the large event payloads several times faster; fall back to the stdlib
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
+
+# The session skips certificate verification; silence the per-request warning
+requests.packages.urllib3.disable_warnings(category=InsecureRequestWarning)
 
 def setup_logging():
     """Setup logging configuration"""
@@ -31,7 +47,203 @@ def setup_logging():
         ]
     )
 
+TOURNAMENT_EVENT_QUERY = """
+    query TournamentPublicEventData($eventId: ID!, $tournamentId: ID!) {
+        tournamentPublicEventData(eventId: $eventId, tournamentId: $tournamentId)
+    }
+"""
+
+def parse_api_datetime(value: Optional[str]) -> Any:
+    """Parse an ISO timestamp from the API once, keeping the raw value if it does not parse"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return value
+
+# Side-prefixed tournament_matches field names, keyed by side number
+SIDE_FIELDS = {
+    side: tuple(
+        f'side{side}_{field}'
+        for field in (
+            'participant_id', 'participant_name', 'draw_position', 'seed_number',
+            'school_name', 'school_id', 'player1_id', 'player1_name',
+            'player2_id', 'player2_name'
+        )
+    )
+    for side in (1, 2)
+}
+
+# Participant fields of a tournament_matches record, filled in per side
+EMPTY_MATCH_FIELDS = dict.fromkeys(SIDE_FIELDS[1] + SIDE_FIELDS[2])
+
+def extract_side_fields(side: Dict[str, Any], participants_lookup: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the tournament_matches fields for one side of a match (empty if the side is unusable)"""
+    field_names = SIDE_FIELDS.get(side.get('sideNumber'))
+    participant_id = side.get('participantId', '').lower()
+    
+    if not field_names or not participant_id:
+        return {}
+    
+    participant_info = participants_lookup.get(participant_id)
+    if participant_info is None:
+        participant_info = {
+            'name': 'Unknown Player',
+            'individual_ids': [participant_id],
+            'individual_names': ['Unknown Player'],
+            'school_name': None,
+            'school_id': None
+        }
+    
+    individual_ids = participant_info['individual_ids']
+    individual_names = participant_info['individual_names']
+    values = [
+        participant_id,
+        participant_info['name'],
+        side.get('drawPosition'),
+        side.get('seedNumber'),
+        participant_info['school_name'],
+        participant_info['school_id']
+    ]
+    
+    # Individual players: player1 always, player2 for doubles only
+    for i in range(2):
+        if len(individual_ids) > i:
+            values.append(individual_ids[i])
+            values.append(individual_names[i] if len(individual_names) > i else 'Unknown')
+        else:
+            values.extend((None, None))
+    
+    return dict(zip(field_names, values))
+
+# Draw name words that identify the gender of a draw, e.g. "Women's Singles";
+# the apostrophe-less forms ("Mens Singles", "Womens Doubles") are listed too
+DRAW_GENDER_WORDS = {
+    'men': 'MALE',
+    'mens': 'MALE',
+    'male': 'MALE',
+    'males': 'MALE',
+    'women': 'FEMALE',
+    'womens': 'FEMALE',
+    'female': 'FEMALE',
+    'females': 'FEMALE',
+    'mixed': 'MIXED'
+}
+DRAW_NAME_WORD_RE = re.compile(r'[a-z]+')
+
+# Ultra-simple 2-table schema, logged in one record before processing
+ULTRA_SIMPLE_SCHEMA = """-- EVERYTHING YOU NEED IN JUST 2 TABLES!
+-- No redundancy, complete tournament data capture
+
+CREATE TABLE tournament_draws (
+    draw_id VARCHAR PRIMARY KEY,
+    tournament_id VARCHAR,
+    event_id VARCHAR,
+    draw_name VARCHAR,
+    draw_type VARCHAR,
+    draw_size INTEGER,
+    draw_active BOOLEAN,
+    draw_completed BOOLEAN,
+    event_type VARCHAR,
+    gender VARCHAR,
+    match_up_format VARCHAR,
+    updated_at_api TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE tournament_matches (
+    id SERIAL PRIMARY KEY,
+    match_up_id VARCHAR NOT NULL UNIQUE,
+    draw_id VARCHAR REFERENCES tournament_draws(draw_id),
+    tournament_id VARCHAR,
+    event_id VARCHAR,
+    round_name VARCHAR,
+    round_number INTEGER,
+    round_position INTEGER,
+    match_type VARCHAR,
+    match_status VARCHAR,
+    structure_name VARCHAR,
+    -- Side 1 data (pair info + individual players + school)
+    side1_participant_id VARCHAR,
+    side1_participant_name VARCHAR,
+    side1_draw_position INTEGER,
+    side1_seed_number INTEGER,
+    side1_school_name VARCHAR,  -- School/Team name (e.g., 'Pepperdine', 'Arizona')
+    side1_school_id VARCHAR,   -- School/Team ID
+    side1_player1_id VARCHAR,  -- Individual player ID
+    side1_player1_name VARCHAR,  -- Individual player name
+    side1_player2_id VARCHAR,  -- Partner ID (doubles only)
+    side1_player2_name VARCHAR,  -- Partner name (doubles only)
+    -- Side 2 data (pair info + individual players + school)
+    side2_participant_id VARCHAR,
+    side2_participant_name VARCHAR,
+    side2_draw_position INTEGER,
+    side2_seed_number INTEGER,
+    side2_school_name VARCHAR,  -- School/Team name (e.g., 'Oklahoma State', 'Cal')
+    side2_school_id VARCHAR,   -- School/Team ID
+    side2_player1_id VARCHAR,  -- Individual player ID
+    side2_player1_name VARCHAR,  -- Individual player name
+    side2_player2_id VARCHAR,  -- Partner ID (doubles only)
+    side2_player2_name VARCHAR,  -- Partner name (doubles only)
+    -- Match outcome and progression
+    winning_side INTEGER,
+    winner_match_up_id VARCHAR,
+    loser_match_up_id VARCHAR,
+    -- Complete scores
+    score_side1 VARCHAR,
+    score_side2 VARCHAR,
+    -- Scheduling
+    scheduled_date DATE,
+    venue_name VARCHAR,
+    created_at_api TIMESTAMP
+);
+
+-- With this enhanced schema you can:
+-- ✅ Track individual players in both singles and doubles
+-- ✅ Analyze player partnerships in doubles
+-- ✅ Track school/team performance in tournaments
+-- ✅ Build complete player statistics across tournaments
+-- ✅ Analyze school vs school matchups
+-- ✅ Query player performance regardless of match type
+-- ✅ Generate team-based tournament analytics
+"""
+
+DRAW_COLUMNS = [
+    'draw_id', 'tournament_id', 'event_id', 'draw_name', 'draw_type', 'draw_size',
+    'draw_active', 'draw_completed', 'event_type', 'gender', 'match_up_format', 'updated_at_api'
+]
+
+# tournament_matches columns written when not in dry run mode
+MATCH_COLUMNS = [
+    'match_up_id', 'draw_id', 'tournament_id', 'event_id', 'round_name', 'round_number',
+    'round_position', 'match_type', 'match_format', 'match_status', 'stage', 'structure_name',
+    'winning_side', 'scheduled_date', 'scheduled_time', 'venue_name', 'score_side1',
+    'score_side2', 'created_at_api', 'updated_at_api', *EMPTY_MATCH_FIELDS
+]
+
+INSERT_DRAW_SQL = f"""
+    INSERT INTO tournament_draws ({', '.join(DRAW_COLUMNS)})
+    VALUES ({', '.join(f'%({col})s' for col in DRAW_COLUMNS)})
+    ON CONFLICT (draw_id) DO NOTHING
+"""
+
+INSERT_MATCHES_SQL = f"""
+    INSERT INTO tournament_matches ({', '.join(MATCH_COLUMNS)})
+    VALUES %s
+    ON CONFLICT (match_up_id) DO NOTHING
+"""
+
 class UltraSimpleTournamentCollector:
+    # Headers for API requests, shared by every instance
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Accept': 'application/json',
+        'Content-Type': 'application/json',
+        'Origin': 'https://www.collegetennis.com',
+        'Referer': 'https://www.collegetennis.com/',
+    }
+
     def __init__(self, database_url: str = None, dry_run: bool = True):
         """Initialize the collector"""
         self.database_url = database_url
@@ -40,14 +252,11 @@ class UltraSimpleTournamentCollector:
         # API configuration
         self.api_url = "https://prd-itat-kube-tournamentevent-api.clubspark.pro/"
         
-        # Headers for API requests
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'application/json',
-            'Content-Type': 'application/json',
-            'Origin': 'https://www.collegetennis.com',
-            'Referer': 'https://www.collegetennis.com/',
-        }
+        # Reuse keepalive connections across events instead of a new TLS handshake per request
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.verify = False
+        self.session.mount('https://', HTTPAdapter(pool_connections=20, pool_maxsize=20))
 
     def create_api_query(self, tournament_id: str, event_id: str) -> Dict[str, Any]:
         """Create the GraphQL query payload"""
@@ -56,11 +265,7 @@ class UltraSimpleTournamentCollector:
         
         payload = {
             "operationName": "TournamentPublicEventData",
-            "query": """
-                query TournamentPublicEventData($eventId: ID!, $tournamentId: ID!) {
-                    tournamentPublicEventData(eventId: $eventId, tournamentId: $tournamentId)
-                }
-            """,
+            "query": TOURNAMENT_EVENT_QUERY,
             "variables": {
                 "eventId": event_id_for_api,
                 "tournamentId": tournament_id_for_api
@@ -69,6 +274,66 @@ class UltraSimpleTournamentCollector:
         
         return payload
 
+    def create_batched_api_query(self, pairs: List[Tuple[str, str]]) -> Dict[str, Any]:
+        """Create one GraphQL payload that asks for several events through aliased fields"""
+        params = []
+        fields = []
+        variables = {}
+        
+        for i, (tournament_id, event_id) in enumerate(pairs):
+            params.append(f"$eid{i}: ID!, $tid{i}: ID!")
+            fields.append(f"q{i}: tournamentPublicEventData(eventId: $eid{i}, tournamentId: $tid{i})")
+            variables[f"eid{i}"] = event_id.upper() if event_id else ""
+            variables[f"tid{i}"] = tournament_id.upper() if tournament_id else ""
+        
+        return {
+            "operationName": "TournamentPublicEventDataBatch",
+            "query": f"query TournamentPublicEventDataBatch({', '.join(params)}) {{ {' '.join(fields)} }}",
+            "variables": variables
+        }
+
+    def parse_event_data(self, event_data: Any) -> Dict[str, Any]:
+        """Decode tournamentPublicEventData, which the API may return as a JSON string"""
+        if isinstance(event_data, str):
+            try:
+                event_data = json_loads(event_data)
+            except json.JSONDecodeError as e:
+                logging.error(f"Failed to parse JSON string: {str(e)}")
+                return {}
+        
+        return event_data or {}
+
+    def fetch_tournaments_batched(self, pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Fetch several events in one POST, keyed by (tournament_id, event_id).
+
+        Falls back to one request per event, up to 20 in flight, if the batched request is rejected.
+        """
+        if not pairs:
+            return {}
+        
+        logging.info(f"Fetching {len(pairs)} events in one batched request")
+        
+        try:
+            response = self.session.post(
+                self.api_url,
+                json=self.create_batched_api_query(pairs),
+                timeout=60
+            )
+            data = json_loads(response.content) if response.status_code == 200 else {}
+        except Exception as e:
+            logging.error(f"Error fetching batched tournament data: {str(e)}")
+            data = {}
+        
+        results = data.get('data') or {}
+        if data.get('errors') or len(results) != len(pairs):
+            logging.warning("Batched request failed, fetching events concurrently instead")
+            # Matches the session's pool size, so every worker gets a keepalive connection
+            with ThreadPoolExecutor(max_workers=min(20, len(pairs))) as executor:
+                fetched = executor.map(lambda pair: self.fetch_tournament_data(*pair), pairs)
+                return dict(zip(pairs, fetched))
+        
+        return {pair: self.parse_event_data(results.get(f"q{i}")) for i, pair in enumerate(pairs)}
+
     def fetch_tournament_data(self, tournament_id: str, event_id: str) -> Dict[str, Any]:
         """Fetch complete tournament data from API"""
         logging.info(f"Fetching tournament data for tournament: {tournament_id}, event: {event_id}")
@@ -76,28 +341,17 @@ class UltraSimpleTournamentCollector:
         try:
             payload = self.create_api_query(tournament_id, event_id)
             
-            response = requests.post(
+            response = self.session.post(
                 self.api_url,
                 json=payload,
-                headers=self.headers,
-                verify=False,
                 timeout=30
             )
             
             if response.status_code == 200:
-                data = response.json()
+                data = json_loads(response.content)
                 
                 if 'data' in data and 'tournamentPublicEventData' in data['data']:
-                    event_data = data['data']['tournamentPublicEventData']
-                    
-                    if isinstance(event_data, str):
-                        try:
-                            event_data = json.loads(event_data)
-                        except json.JSONDecodeError as e:
-                            logging.error(f"Failed to parse JSON string: {str(e)}")
-                            return {}
-                    
-                    return event_data
+                    return self.parse_event_data(data['data']['tournamentPublicEventData'])
                 else:
                     logging.warning("No event data found in response")
                     return {}
@@ -109,47 +363,45 @@ class UltraSimpleTournamentCollector:
             logging.error(f"Error fetching tournament data: {str(e)}")
             return {}
 
-    def extract_draw_info(self, draw_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Extract draw information for tournament_draws table"""
+    def extract_draw_info(self, draw_data: Dict[str, Any], tournament_id: str, event_id: str) -> Dict[str, Any]:
+        """Extract draw information for tournament_draws table (ids already lowercased)"""
         draw_info = {
             'draw_id': draw_data.get('drawId', '').lower(),
+            'tournament_id': tournament_id,
+            'event_id': event_id,
             'draw_name': draw_data.get('drawName', ''),
             'draw_type': draw_data.get('drawType', ''),
             'draw_size': len(draw_data.get('structures', [{}])[0].get('positionAssignments', [])),
             'draw_active': draw_data.get('drawActive', True),
             'draw_completed': draw_data.get('drawCompleted', False),
-            'updated_at_api': draw_data.get('updatedAt'),
+            'updated_at_api': parse_api_datetime(draw_data.get('updatedAt')),
             'match_up_format': draw_data.get('matchUpFormat', '')
         }
         
-        # Determine event type and gender from draw name
-        draw_name_lower = draw_info['draw_name'].lower()
+        # Determine event type and gender from the words of the draw name
+        words = DRAW_NAME_WORD_RE.findall(draw_info['draw_name'].lower())
         
-        if 'doubles' in draw_name_lower:
-            draw_info['event_type'] = 'DOUBLES'
-        else:
-            draw_info['event_type'] = 'SINGLES'
-            
-        if 'men' in draw_name_lower or 'male' in draw_name_lower:
-            draw_info['gender'] = 'MALE'
-        elif 'women' in draw_name_lower or 'female' in draw_name_lower:
-            draw_info['gender'] = 'FEMALE'
-        elif 'mixed' in draw_name_lower:
-            draw_info['gender'] = 'MIXED'
-        else:
-            draw_info['gender'] = 'UNKNOWN'
+        draw_info['event_type'] = 'DOUBLES' if 'doubles' in words else 'SINGLES'
+        draw_info['gender'] = next((DRAW_GENDER_WORDS[word] for word in words if word in DRAW_GENDER_WORDS), 'UNKNOWN')
         
         return draw_info
 
-    def extract_tournament_match(self, match_data: Dict[str, Any], participants_lookup: Dict[str, Any]) -> Dict[str, Any]:
-        """Extract match information for tournament_matches table (everything in one record)"""
-        
-        # Extract basic match info
-        match_info = {
+    def extract_tournament_match(self, match_data: Dict[str, Any], participants_lookup: Dict[str, Any],
+                                 tournament_id: str, event_id: str, draw_id: str) -> Dict[str, Any]:
+        """Extract match information for tournament_matches table (everything in one record).
+
+        tournament_id, event_id and draw_id are the match's ids, already lowercased.
+        """
+        
+        # Start from the all-None participant fields and fill in the basics
+        match_info = EMPTY_MATCH_FIELDS.copy()
+        schedule = match_data.get('schedule') or {}
+        score = match_data.get('score') or {}
+        match_info.update({
             'match_up_id': match_data.get('matchUpId', ''),
-            'draw_id': match_data.get('drawId', '').lower(),
-            'tournament_id': match_data.get('tournamentId', '').lower(),
-            'event_id': match_data.get('eventId', '').lower(),
+            'draw_id': draw_id,
+            'tournament_id': tournament_id,
+            'event_id': event_id,
             'round_name': match_data.get('roundName', ''),
             'round_number': match_data.get('roundNumber', 0),
             'round_position': match_data.get('roundPosition', 0),
@@ -161,306 +413,188 @@ class UltraSimpleTournamentCollector:
             'winning_side': match_data.get('winningSide'),
             'winner_match_up_id': match_data.get('winnerMatchUpId'),
             'loser_match_up_id': match_data.get('loserMatchUpId'),
-            'scheduled_date': match_data.get('schedule', {}).get('scheduledDate'),
-            'scheduled_time': match_data.get('schedule', {}).get('scheduledTime'),
-            'venue_name': match_data.get('schedule', {}).get('venueName'),
-            'score_side1': match_data.get('score', {}).get('scoreStringSide1', ''),
-            'score_side2': match_data.get('score', {}).get('scoreStringSide2', ''),
-            'created_at_api': match_data.get('createdAt'),
-            'updated_at_api': match_data.get('updatedAt'),
-            
-            # Initialize all participant fields
-            'side1_participant_id': None,
-            'side1_participant_name': None,
-            'side1_draw_position': None,
-            'side1_seed_number': None,
-            'side1_school_name': None,
-            'side1_school_id': None,
-            'side1_player1_id': None,
-            'side1_player1_name': None,
-            'side1_player2_id': None,
-            'side1_player2_name': None,
-            'side2_participant_id': None,
-            'side2_participant_name': None,
-            'side2_draw_position': None,
-            'side2_seed_number': None,
-            'side2_school_name': None,
-            'side2_school_id': None,
-            'side2_player1_id': None,
-            'side2_player1_name': None,
-            'side2_player2_id': None,
-            'side2_player2_name': None
-        }
+            'scheduled_date': parse_api_datetime(schedule.get('scheduledDate')),
+            'scheduled_time': schedule.get('scheduledTime'),
+            'venue_name': schedule.get('venueName'),
+            'score_side1': score.get('scoreStringSide1', ''),
+            'score_side2': score.get('scoreStringSide2', ''),
+            'created_at_api': parse_api_datetime(match_data.get('createdAt')),
+            'updated_at_api': parse_api_datetime(match_data.get('updatedAt'))
+        })
+        
+        # Extract participant information from sides, stopping once both are filled
+        filled_sides = set()
+        for side in match_data.get('sides') or []:
+            side_fields = extract_side_fields(side, participants_lookup)
+            if side_fields:
+                match_info.update(side_fields)
+                filled_sides.add(side['sideNumber'])
+                if len(filled_sides) == 2:
+                    break
         
-        # Extract participant information from sides
-        sides = match_data.get('sides', [])
-        
-        for side in sides:
-            side_number = side.get('sideNumber')
-            participant_id = side.get('participantId', '').lower()
-            draw_position = side.get('drawPosition')
-            seed_number = side.get('seedNumber')
-            
-            if not participant_id:
-                continue
-                
-            participant_info = participants_lookup.get(participant_id, {
-                'name': 'Unknown Player',
-                'type': 'INDIVIDUAL',
-                'individual_ids': [participant_id],
-                'individual_names': ['Unknown Player'],
-                'school_name': None,
-                'school_id': None
-            })
-            
-            participant_name = participant_info['name']
-            participant_type = participant_info['type']
-            individual_ids = participant_info['individual_ids']
-            individual_names = participant_info['individual_names']
-            school_name = participant_info['school_name']
-            school_id = participant_info['school_id']
+        return match_info
+
+    def extract_school_info(self, participant: Dict[str, Any]) -> tuple:
+        """Return (school_name, school_id) from a participant's first team"""
+        teams = participant.get('teams', [])
+        school_name = None
+        school_id = None
+        
+        if teams and len(teams) > 0:
+            team = teams[0]  # Take first team
+            school_name = team.get('participantOtherName') or team.get('participantName')
+            school_id = team.get('teamId') or team.get('participantId')
             
-            if side_number == 1:
-                match_info.update({
-                    'side1_participant_id': participant_id,
-                    'side1_participant_name': participant_name,
-                    'side1_draw_position': draw_position,
-                    'side1_seed_number': seed_number,
-                    'side1_school_name': school_name,
-                    'side1_school_id': school_id
-                })
-                
-                # Add individual player information
-                if len(individual_ids) >= 1:
-                    match_info['side1_player1_id'] = individual_ids[0]
-                    match_info['side1_player1_name'] = individual_names[0] if len(individual_names) >= 1 else 'Unknown'
-                
-                if len(individual_ids) >= 2:
-                    match_info['side1_player2_id'] = individual_ids[1]
-                    match_info['side1_player2_name'] = individual_names[1] if len(individual_names) >= 2 else 'Unknown'
-                
-            elif side_number == 2:
-                match_info.update({
-                    'side2_participant_id': participant_id,
-                    'side2_participant_name': participant_name,
-                    'side2_draw_position': draw_position,
-                    'side2_seed_number': seed_number,
-                    'side2_school_name': school_name,
-                    'side2_school_id': school_id
-                })
-                
-                # Add individual player information
-                if len(individual_ids) >= 1:
-                    match_info['side2_player1_id'] = individual_ids[0]
-                    match_info['side2_player1_name'] = individual_names[0] if len(individual_names) >= 1 else 'Unknown'
-                
-                if len(individual_ids) >= 2:
-                    match_info['side2_player2_id'] = individual_ids[1]
-                    match_info['side2_player2_name'] = individual_names[1] if len(individual_names) >= 2 else 'Unknown'
+            # Every player of a school repeats these; intern so they share one string each
+            if school_name:
+                school_name = sys.intern(school_name)
+            if school_id:
+                school_id = sys.intern(school_id)
         
-        return match_info
+        return school_name, school_id
 
     def build_participants_lookup(self, event_data: Dict[str, Any]) -> Dict[str, Any]:
         """Build comprehensive lookup dictionary for participant data"""
         participants_lookup = {}
         individual_participants = {}
+        pairs = []
         
         participants = event_data.get('participants', [])
         
-        # First pass: collect all individual participants
+        # First pass: collect all individual participants; pairs wait for the
+        # second pass, once every member they can name has been seen
         for participant in participants:
             participant_id = participant.get('participantId', '').lower()
-            participant_name = participant.get('participantName', 'Unknown Player')
             participant_type = participant.get('participantType', 'INDIVIDUAL')
             
             if not participant_id:
                 continue
             
-            # Extract school/team information
-            teams = participant.get('teams', [])
-            school_name = None
-            school_id = None
+            if participant_type == 'PAIR':
+                pairs.append((participant_id, participant))
+                continue
             
-            if teams and len(teams) > 0:
-                team = teams[0]  # Take first team
-                school_name = team.get('participantOtherName') or team.get('participantName')
-                school_id = team.get('teamId') or team.get('participantId')
+            if participant_type != 'INDIVIDUAL':
+                continue
             
-            if participant_type == 'INDIVIDUAL':
-                individual_participants[participant_id] = {
-                    'name': participant_name,
-                    'school_name': school_name,
-                    'school_id': school_id
-                }
-                participants_lookup[participant_id] = {
-                    'name': participant_name,
-                    'type': 'INDIVIDUAL',
-                    'individual_ids': [participant_id],
-                    'individual_names': [participant_name],
-                    'school_name': school_name,
-                    'school_id': school_id
-                }
+            participant_name = participant.get('participantName', 'Unknown Player')
+            school_name, school_id = self.extract_school_info(participant)
             
-            elif participant_type == 'PAIR':
-                individual_ids = participant.get('individualParticipantIds', [])
-                individual_ids = [pid.lower() for pid in individual_ids]
-                
-                # Get individual names and school info for the pair
-                individual_names = []
-                pair_school_name = school_name  # Pair's school (if any)
-                pair_school_id = school_id
-                
-                for ind_id in individual_ids:
-                    # Look for the individual in the current participants list
-                    ind_name = None
-                    ind_school_name = None
-                    ind_school_id = None
-                    
-                    for p in participants:
-                        if p.get('participantId', '').lower() == ind_id:
-                            ind_name = p.get('participantName', 'Unknown Player')
-                            
-                            # Get school info from individual participant
-                            ind_teams = p.get('teams', [])
-                            if ind_teams and len(ind_teams) > 0:
-                                ind_team = ind_teams[0]
-                                ind_school_name = ind_team.get('participantOtherName') or ind_team.get('participantName')
-                                ind_school_id = ind_team.get('teamId') or ind_team.get('participantId')
-                            break
-                    
-                    if not ind_name:
-                        # Fallback to individual_participants if already processed
-                        ind_info = individual_participants.get(ind_id, {})
-                        ind_name = ind_info.get('name', f'Player_{ind_id[:8]}')
-                        ind_school_name = ind_info.get('school_name')
-                        ind_school_id = ind_info.get('school_id')
-                    
-                    individual_names.append(ind_name)
-                    
-                    # Use individual's school info if pair doesn't have school info
-                    if not pair_school_name and ind_school_name:
-                        pair_school_name = ind_school_name
-                        pair_school_id = ind_school_id
-                
-                participants_lookup[participant_id] = {
-                    'name': participant_name,  # e.g., "Main/Tsai"
-                    'type': 'PAIR',
-                    'individual_ids': individual_ids,
-                    'individual_names': individual_names,
-                    'school_name': pair_school_name,
-                    'school_id': pair_school_id
-                }
+            individual_participants[participant_id] = {
+                'name': participant_name,
+                'school_name': school_name,
+                'school_id': school_id
+            }
+            participants_lookup[participant_id] = {
+                'name': participant_name,
+                'type': 'INDIVIDUAL',
+                'individual_ids': [participant_id],
+                'individual_names': [participant_name],
+                'school_name': school_name,
+                'school_id': school_id
+            }
+        
+        # Second pass: pairs look their members up in individual_participants
+        for participant_id, participant in pairs:
+            individual_ids = [pid.lower() for pid in participant.get('individualParticipantIds', [])]
+            members = [
+                individual_participants.get(ind_id)
+                or {'name': f'Player_{ind_id[:8]}', 'school_name': None, 'school_id': None}
+                for ind_id in individual_ids
+            ]
+            individual_names = [member['name'] for member in members]
+            
+            # Fall back to the first member's school when the pair has none
+            pair_school_name, pair_school_id = self.extract_school_info(participant)
+            if not pair_school_name:
+                pair_school_name, pair_school_id = next(
+                    ((member['school_name'], member['school_id']) for member in members if member['school_name']),
+                    (None, None)
+                )
+            
+            participants_lookup[participant_id] = {
+                'name': participant.get('participantName', 'Unknown Player'),  # e.g., "Main/Tsai"
+                'type': 'PAIR',
+                'individual_ids': individual_ids,
+                'individual_names': individual_names,
+                'school_name': pair_school_name,
+                'school_id': pair_school_id
+            }
         
         return participants_lookup
 
     def log_table_data(self, table_name: str, data: Any, max_records: int = 3):
-        """Log what would be inserted into database tables"""
-        logging.info(f"\n{'='*80}")
-        logging.info(f"TABLE: {table_name}")
-        logging.info(f"{'='*80}")
+        """Log what would be inserted into database tables, one log call per record"""
+        # Skip building the record dumps when INFO is filtered out
+        if not logging.getLogger().isEnabledFor(logging.INFO):
+            return
+        
+        logging.info(f"\n{'='*80}\nTABLE: {table_name}\n{'='*80}")
         
         if isinstance(data, list):
             logging.info(f"Total records to insert: {len(data)}")
             
             for i, record in enumerate(data[:max_records]):
-                logging.info(f"\nRecord {i+1}:")
-                for key, value in record.items():
-                    logging.info(f"  {key}: {value}")
+                fields = "\n".join(f"  {key}: {value}" for key, value in record.items())
+                logging.info(f"\nRecord {i+1}:\n{fields}")
             
             if len(data) > max_records:
                 logging.info(f"\n... and {len(data) - max_records} more records")
         
         elif isinstance(data, dict):
-            logging.info(f"Single record to insert:")
-            for key, value in data.items():
-                logging.info(f"  {key}: {value}")
+            fields = "\n".join(f"  {key}: {value}" for key, value in data.items())
+            logging.info(f"Single record to insert:\n{fields}")
         
         logging.info(f"{'='*80}\n")
 
     def log_ultra_simple_schemas(self):
         """Log the ultra-simple 2-table schema"""
-        logging.info(f"\n{'='*80}")
-        logging.info(f"ULTRA-SIMPLE 2-TABLE SCHEMA")
-        logging.info(f"{'='*80}")
-        
-        logging.info(f"\n-- EVERYTHING YOU NEED IN JUST 2 TABLES!")
-        logging.info(f"-- No redundancy, complete tournament data capture")
-        
-        # Tournament Draws table
-        logging.info(f"\nCREATE TABLE tournament_draws (")
-        logging.info(f"    draw_id VARCHAR PRIMARY KEY,")
-        logging.info(f"    tournament_id VARCHAR,")
-        logging.info(f"    event_id VARCHAR,")
-        logging.info(f"    draw_name VARCHAR,")
-        logging.info(f"    draw_type VARCHAR,")
-        logging.info(f"    draw_size INTEGER,")
-        logging.info(f"    draw_active BOOLEAN,")
-        logging.info(f"    draw_completed BOOLEAN,")
-        logging.info(f"    event_type VARCHAR,")
-        logging.info(f"    gender VARCHAR,")
-        logging.info(f"    match_up_format VARCHAR,")
-        logging.info(f"    updated_at_api TIMESTAMP,")
-        logging.info(f"    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP")
-        logging.info(f");")
-        
-        # Tournament Matches table (everything in one place)
-        logging.info(f"\nCREATE TABLE tournament_matches (")
-        logging.info(f"    id SERIAL PRIMARY KEY,")
-        logging.info(f"    match_up_id VARCHAR NOT NULL UNIQUE,")
-        logging.info(f"    draw_id VARCHAR REFERENCES tournament_draws(draw_id),")
-        logging.info(f"    tournament_id VARCHAR,")
-        logging.info(f"    event_id VARCHAR,")
-        logging.info(f"    round_name VARCHAR,")
-        logging.info(f"    round_number INTEGER,")
-        logging.info(f"    round_position INTEGER,")
-        logging.info(f"    match_type VARCHAR,")
-        logging.info(f"    match_status VARCHAR,")
-        logging.info(f"    structure_name VARCHAR,")
-        logging.info(f"    -- Side 1 data (pair info + individual players + school)")
-        logging.info(f"    side1_participant_id VARCHAR,")
-        logging.info(f"    side1_participant_name VARCHAR,")
-        logging.info(f"    side1_draw_position INTEGER,")
-        logging.info(f"    side1_seed_number INTEGER,")
-        logging.info(f"    side1_school_name VARCHAR,  -- School/Team name (e.g., 'Pepperdine', 'Arizona')")
-        logging.info(f"    side1_school_id VARCHAR,   -- School/Team ID")
-        logging.info(f"    side1_player1_id VARCHAR,  -- Individual player ID")
-        logging.info(f"    side1_player1_name VARCHAR,  -- Individual player name")
-        logging.info(f"    side1_player2_id VARCHAR,  -- Partner ID (doubles only)")
-        logging.info(f"    side1_player2_name VARCHAR,  -- Partner name (doubles only)")
-        logging.info(f"    -- Side 2 data (pair info + individual players + school)")
-        logging.info(f"    side2_participant_id VARCHAR,")
-        logging.info(f"    side2_participant_name VARCHAR,")
-        logging.info(f"    side2_draw_position INTEGER,")
-        logging.info(f"    side2_seed_number INTEGER,")
-        logging.info(f"    side2_school_name VARCHAR,  -- School/Team name (e.g., 'Oklahoma State', 'Cal')")
-        logging.info(f"    side2_school_id VARCHAR,   -- School/Team ID")
-        logging.info(f"    side2_player1_id VARCHAR,  -- Individual player ID")
-        logging.info(f"    side2_player1_name VARCHAR,  -- Individual player name")
-        logging.info(f"    side2_player2_id VARCHAR,  -- Partner ID (doubles only)")
-        logging.info(f"    side2_player2_name VARCHAR,  -- Partner name (doubles only)")
-        logging.info(f"    -- Match outcome and progression")
-        logging.info(f"    winning_side INTEGER,")
-        logging.info(f"    winner_match_up_id VARCHAR,")
-        logging.info(f"    loser_match_up_id VARCHAR,")
-        logging.info(f"    -- Complete scores")
-        logging.info(f"    score_side1 VARCHAR,")
-        logging.info(f"    score_side2 VARCHAR,")
-        logging.info(f"    -- Scheduling")
-        logging.info(f"    scheduled_date DATE,")
-        logging.info(f"    venue_name VARCHAR,")
-        logging.info(f"    created_at_api TIMESTAMP")
-        logging.info(f");")
-        
-        logging.info(f"\n-- With this enhanced schema you can:")
-        logging.info(f"-- ✅ Track individual players in both singles and doubles")
-        logging.info(f"-- ✅ Analyze player partnerships in doubles")
-        logging.info(f"-- ✅ Track school/team performance in tournaments")
-        logging.info(f"-- ✅ Build complete player statistics across tournaments")
-        logging.info(f"-- ✅ Analyze school vs school matchups")
-        logging.info(f"-- ✅ Query player performance regardless of match type")
-        logging.info(f"-- ✅ Generate team-based tournament analytics")
+        if not logging.getLogger().isEnabledFor(logging.INFO):
+            return
         
-        logging.info(f"{'='*80}\n")
+        logging.info(f"\n{'='*80}\nULTRA-SIMPLE 2-TABLE SCHEMA\n{'='*80}\n\n{ULTRA_SIMPLE_SCHEMA}{'='*80}\n")
+
+    def iter_draw_matches(self, draw: Dict[str, Any], participants_lookup: Dict[str, Any],
+                          tournament_id: str, event_id: str):
+        """Yield one tournament_matches record per match in every structure of a draw"""
+        draw_id = draw.get('drawId', '').lower()
+        
+        for struct_idx, structure in enumerate(draw.get('structures', [])):
+            struct_name = structure.get('structureName', f'Structure {struct_idx + 1}')
+            logging.info(f"  📊 Processing Structure: {struct_name}")
+            
+            for round_num, matches in structure.get('roundMatchUps', {}).items():
+                if not isinstance(matches, list):
+                    continue
+                
+                logging.info(f"    🏆 Processing Round {round_num}: {len(matches)} matches")
+                
+                for match_data in matches:
+                    # Extract complete tournament match info (everything in one record)
+                    yield self.extract_tournament_match(match_data, participants_lookup, tournament_id, event_id, draw_id)
+
+    def store_draw_matches(self, draw_info: Dict[str, Any], matches) -> int:
+        """Insert a draw and stream its matches into the database in pages of 1000"""
+        match_count = 0
+        
+        def match_rows():
+            nonlocal match_count
+            for match in matches:
+                match_count += 1
+                yield tuple(match.get(col) for col in MATCH_COLUMNS)
+        
+        conn = psycopg2.connect(self.database_url)
+        try:
+            with conn, conn.cursor() as cur:
+                cur.execute(INSERT_DRAW_SQL, {col: draw_info.get(col) for col in DRAW_COLUMNS})
+                execute_values(cur, INSERT_MATCHES_SQL, match_rows(), page_size=1000)
+            logging.info(f"💾 Stored draw {draw_info['draw_id']} with {match_count} matches")
+        except Exception as e:
+            logging.error(f"❌ Error storing draw {draw_info['draw_id']}: {e}")
+        finally:
+            conn.close()
+        
+        return match_count
 
     def process_single_tournament_event(self, tournament_id: str, event_id: str):
         """Process a single tournament event with ultra-simple 2-table approach"""
@@ -492,46 +626,33 @@ class UltraSimpleTournamentCollector:
         
         logging.info(f"🎾 Found {len(draws_data)} draws to process")
         
+        # Lowercase once for every draw and match of this event
+        tournament_id_lc = tournament_id.lower()
+        event_id_lc = event_id.lower()
+        
         # Process each draw
         for draw_idx, draw in enumerate(draws_data):
             logging.info(f"\n🎯 Processing Draw {draw_idx + 1}: {draw.get('drawName', 'Unknown')}")
             
             # Extract draw info
-            draw_info = self.extract_draw_info(draw)
-            draw_info['tournament_id'] = tournament_id.lower()
-            draw_info['event_id'] = event_id.lower()
+            draw_info = self.extract_draw_info(draw, tournament_id_lc, event_id_lc)
             
             self.log_table_data("tournament_draws", draw_info)
             
-            # Process structures and extract all matches
-            structures = draw.get('structures', [])
-            all_tournament_matches = []
-            
-            for struct_idx, structure in enumerate(structures):
-                struct_name = structure.get('structureName', f'Structure {struct_idx + 1}')
-                logging.info(f"  📊 Processing Structure: {struct_name}")
-                
-                # Process round matchups
-                round_matchups = structure.get('roundMatchUps', {})
-                
-                for round_num, matches in round_matchups.items():
-                    if not isinstance(matches, list):
-                        continue
-                    
-                    logging.info(f"    🏆 Processing Round {round_num}: {len(matches)} matches")
-                    
-                    for match_data in matches:
-                        # Extract complete tournament match info (everything in one record)
-                        tournament_match = self.extract_tournament_match(match_data, participants_lookup)
-                        all_tournament_matches.append(tournament_match)
+            tournament_matches = self.iter_draw_matches(draw, participants_lookup, tournament_id_lc, event_id_lc)
             
-            # Log all extracted match data
-            if all_tournament_matches:
-                self.log_table_data("tournament_matches", all_tournament_matches)
+            if self.dry_run:
+                # Log all extracted match data
+                tournament_matches = list(tournament_matches)
+                if tournament_matches:
+                    self.log_table_data("tournament_matches", tournament_matches)
+                match_count = len(tournament_matches)
+            else:
+                match_count = self.store_draw_matches(draw_info, tournament_matches)
             
             # Summary for this draw
             logging.info(f"✅ Draw {draw_idx + 1} Summary:")
-            logging.info(f"   - Tournament Matches: {len(all_tournament_matches)}")
+            logging.info(f"   - Tournament Matches: {match_count}")
             logging.info(f"   - Complete tournament data captured in just 2 tables!")
 
 def main():
@@ -7,13 +7,30 @@ Run this from the backend directory: python migrations/backfill_player_matches_d
 import os
 import sys
 import logging
+import sqlite3
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import InsecureRequestWarning
+from urllib3.util.retry import Retry
 import json
+import threading
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from sqlalchemy import create_engine, text, Column, String
 from sqlalchemy.orm import sessionmaker
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from psycopg2.extras import execute_values
+
+# orjson parses the matchUps payloads several times faster; fall back to the stdlib
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 
 # Add the backend directory to Python path
 backend_root = Path(__file__).parent.parent.parent
@@ -22,6 +39,171 @@ sys.path.insert(0, str(backend_root))
 # Import your models
 from models.models import PlayerMatch, PlayerMatchParticipant
 
+# Resolved draw ids are written in one statement per flush
+UPDATE_DRAW_IDS_SQL = """
+    UPDATE player_matches
+    SET draw_id = v.draw_id
+    FROM (VALUES %s) AS v(id, draw_id)
+    WHERE player_matches.id = v.id
+"""
+
+# Flush pending draw ids once this many matches have been resolved
+DRAW_ID_FLUSH_SIZE = 500
+
+MATCH_UPS_QUERY = """query matchUps($personFilter: [td_PersonFilterOptions], $filter: td_MatchUpFilterOptions) {
+    td_matchUps(personFilter: $personFilter, filter: $filter) {
+        totalItems
+        items {
+            drawId
+            tournament {
+                providerTournamentId
+            }
+            start
+            type
+            sides {
+                players {
+                    person {
+                        externalID
+                    }
+                }
+            }
+            matchUpFormat
+            status
+            collectionPosition
+        }
+    }
+}"""
+
+# Request body fields that are the same for every matchUps call
+MATCH_UPS_BODY = {
+    'operationName': 'matchUps',
+    'query': MATCH_UPS_QUERY
+}
+
+MATCH_UP_STATUSES = ["DEFAULTED", "RETIRED", "WALKOVER", "COMPLETED", "ABANDONED"]
+
+@lru_cache(maxsize=8)
+def match_date_range(days_back: int, today: date) -> Tuple[str, str]:
+    """Return the (after, before) dates for the matchUps filter, computed once per day"""
+    return (today - timedelta(days=days_back)).strftime('%Y-%m-%d'), today.strftime('%Y-%m-%d')
+
+# Shared read-only fallback for missing nested objects
+EMPTY_DICT = {}
+
+# Participants fetched at once, and the overall request rate they share
+API_WORKERS = 8
+API_REQUESTS_PER_SECOND = 4
+
+# Participant ids sent in one personFilter
+PERSONS_PER_REQUEST = 25
+
+class BackfillCheckpoint:
+    """Local SQLite record of the last match id whose batch finished, for resuming a run"""
+    
+    def __init__(self, path: str):
+        # Written from the DrawIdWriter thread once the run starts
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS progress (id INTEGER PRIMARY KEY CHECK (id = 1), last_id INTEGER NOT NULL)")
+        self.conn.commit()
+    
+    def last_id(self) -> int:
+        row = self.conn.execute("SELECT last_id FROM progress WHERE id = 1").fetchone()
+        return row[0] if row else 0
+    
+    def save(self, last_id: int):
+        self.conn.execute(
+            "INSERT INTO progress (id, last_id) VALUES (1, ?) ON CONFLICT (id) DO UPDATE SET last_id = excluded.last_id",
+            (last_id,)
+        )
+        self.conn.commit()
+    
+    def close(self):
+        self.conn.close()
+
+class DrawIdWriter:
+    """Background thread that writes queued draw_id batches so DB commits overlap API fetches.
+
+    Checkpoints are queued behind the writes they cover, so a saved checkpoint never
+    runs ahead of the draw ids actually committed. After a failed write no further
+    checkpoint is saved for the run, so a resume starts before the missing rows.
+    """
+    
+    def __init__(self, backfill: 'PlayerMatchesDrawIdBackfill', checkpoint: 'BackfillCheckpoint'):
+        self.backfill = backfill
+        self.checkpoint = checkpoint
+        self.updated = 0
+        self.failed = False
+        self.queue = queue.Queue(maxsize=20)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+    
+    def run(self):
+        # One database connection for every write of the run, replaced if a write fails
+        conn = None
+        try:
+            while True:
+                item = self.queue.get()
+                if item is None:
+                    return
+                try:
+                    if isinstance(item, dict):
+                        if conn is None:
+                            conn = self.backfill.engine.raw_connection()
+                        self.updated += self.backfill.flush_draw_ids(item, conn, raise_errors=True)
+                    elif not self.failed:
+                        self.checkpoint.save(item)
+                except Exception as e:
+                    if isinstance(item, dict) and not self.failed:
+                        self.failed = True
+                        logging.error("Holding the checkpoint: draw ids after it were not all written")
+                    logging.error(f"Draw id writer error: {str(e)}")
+                    # The connection may have dropped; the next write checks out a fresh one
+                    if conn is not None:
+                        try:
+                            conn.close()
+                        except Exception:
+                            pass
+                        conn = None
+        finally:
+            if conn is not None:
+                conn.close()
+    
+    def submit(self, pending: Dict[int, str]) -> int:
+        """Queue a copy of pending for writing and clear it; returns the number queued"""
+        if not pending:
+            return 0
+        queued = len(pending)
+        self.queue.put(dict(pending))
+        pending.clear()
+        return queued
+    
+    def mark(self, last_id: int):
+        """Save last_id as the checkpoint once everything queued before it is written"""
+        self.queue.put(last_id)
+    
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+class RateLimiter:
+    """Space calls to wait() at least 1/rate seconds apart across all threads"""
+    
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+    
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+# The session skips certificate verification; silence the per-request warning
+requests.packages.urllib3.disable_warnings(category=InsecureRequestWarning)
+
 def setup_logging():
     """Set up logging for the backfill script"""
     logging.basicConfig(
@@ -34,10 +216,20 @@ def setup_logging():
     )
 
 class PlayerMatchesDrawIdBackfill:
+    # Set once add_draw_id_column has run in this process, so repeat runs skip the schema work
+    schema_ready = False
+
     def __init__(self, database_url: str):
         self.database_url = database_url
-        self.engine = create_engine(database_url)
+        self.engine = create_engine(database_url, executemany_mode='values_plus_batch', insertmanyvalues_page_size=1000)
         self.Session = sessionmaker(bind=self.engine)
+        self.rate_limiter = RateLimiter(API_REQUESTS_PER_SECOND)
+        
+        # Whether player_matches.draw_id exists; probed once, then fixed for the run
+        self.has_draw_id_column = None
+        
+        # Set by run_backfill; without it draw ids are written synchronously
+        self.writer = None
         
         # API configuration (same as your collector)
         self.api_url = 'https://prd-itat-kube.clubspark.pro/mesh-api/graphql'
@@ -56,9 +248,29 @@ class PlayerMatchesDrawIdBackfill:
             'Pragma': 'no-cache',
             'Cache-Control': 'no-cache'
         }
+        
+        # One keepalive pool shared by the fetch workers; the GraphQL POST is a read, so it is safe to retry
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.verify = False
+        self.session.mount('https://', HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=32,
+            max_retries=Retry(
+                total=5,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                respect_retry_after_header=True,
+                allowed_methods=frozenset(['POST'])
+            )
+        ))
 
     def add_draw_id_column(self):
         """Add draw_id column to player_matches table if it doesn't exist"""
+        if PlayerMatchesDrawIdBackfill.schema_ready:
+            self.has_draw_id_column = True
+            return
+        
         try:
             logging.info("Adding draw_id column to player_matches table...")
             
@@ -75,38 +287,52 @@ class PlayerMatchesDrawIdBackfill:
                 
                 if result:
                     logging.info("draw_id column already exists, skipping creation")
-                    return
-                
-                # Add the column
-                add_column_sql = text("""
-                    ALTER TABLE player_matches 
-                    ADD COLUMN draw_id VARCHAR
-                """)
-                
-                conn.execute(add_column_sql)
-                conn.commit()
-                
-                logging.info("Successfully added draw_id column to player_matches table")
+                else:
+                    # Add the column
+                    add_column_sql = text("""
+                        ALTER TABLE player_matches 
+                        ADD COLUMN draw_id VARCHAR
+                    """)
+                    
+                    conn.execute(add_column_sql)
+                    conn.commit()
+                    
+                    logging.info("Successfully added draw_id column to player_matches table")
+            
+            self.has_draw_id_column = True
+            
+            # Partial index over the rows still missing draw_id, so each keyset page is an index range scan
+            with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                conn.execute(text("""
+                    CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_pm_draw_backfill
+                    ON player_matches (id)
+                    WHERE draw_id IS NULL OR draw_id = ''
+                """))
+            
+            PlayerMatchesDrawIdBackfill.schema_ready = True
                 
         except Exception as e:
             logging.error(f"Error adding draw_id column: {str(e)}")
             raise
 
-    def get_total_matches_needing_draw_id(self) -> int:
-        """Get the total count of matches that need draw_id"""
-        session = self.Session()
-        try:
-            # Check if draw_id column exists
+    def draw_id_column_exists(self, session) -> bool:
+        """Check information_schema for player_matches.draw_id once and remember the answer"""
+        if self.has_draw_id_column is None:
             check_column = text("""
                 SELECT column_name 
                 FROM information_schema.columns 
                 WHERE table_name = 'player_matches' 
                 AND column_name = 'draw_id'
             """)
-            
-            column_exists = session.execute(check_column).fetchone()
-            
-            if not column_exists:
+            self.has_draw_id_column = session.execute(check_column).fetchone() is not None
+        
+        return self.has_draw_id_column
+
+    def get_total_matches_needing_draw_id(self, conn=None) -> int:
+        """Get the total count of matches that need draw_id (on conn if given)"""
+        session = conn if conn is not None else self.Session()
+        try:
+            if not self.draw_id_column_exists(session):
                 # Count all matches if column doesn't exist
                 query = text("""
                     SELECT COUNT(*)
@@ -129,222 +355,242 @@ class PlayerMatchesDrawIdBackfill:
             logging.error(f"Error getting total count: {str(e)}")
             return 0
         finally:
-            session.close()
+            if conn is None:
+                session.close()
 
-    def get_player_matches_without_draw_id(self, limit: int = 1000, offset: int = 0) -> List[Dict]:
-        """Get player matches that don't have draw_id populated"""
-        session = self.Session()
+    def get_player_matches_without_draw_id(self, limit: int = 1000, after_id: int = 0, conn=None) -> List[Dict]:
+        """Get the next page of player matches without draw_id, keyset-paged on id after after_id (on conn if given)"""
+        session = conn if conn is not None else self.Session()
         try:
-            # First check if draw_id column exists
-            check_column = text("""
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name = 'player_matches' 
-                AND column_name = 'draw_id'
-            """)
-            
-            column_exists = session.execute(check_column).fetchone()
-            
-            if not column_exists:
+            if not self.draw_id_column_exists(session):
                 logging.info("draw_id column doesn't exist yet, getting all matches for backfill")
-                # Get all matches if column doesn't exist - use a subquery to get match IDs first
-                base_query = text("""
-                    SELECT pm.id
-                    FROM player_matches pm
-                    WHERE pm.start_time >= CURRENT_DATE - INTERVAL '365 days'
-                    ORDER BY pm.id
-                    LIMIT :limit OFFSET :offset
-                """)
+                # Get all matches if column doesn't exist
+                draw_id_filter = ""
             else:
                 # Get matches without draw_id
-                base_query = text("""
+                draw_id_filter = "AND (pm.draw_id IS NULL OR pm.draw_id = '')"
+            
+            # Page the match ids, then join their participants in the same statement
+            query = text(f"""
+                WITH page AS (
                     SELECT pm.id
                     FROM player_matches pm
-                    WHERE (pm.draw_id IS NULL OR pm.draw_id = '')
-                    AND pm.start_time >= CURRENT_DATE - INTERVAL '365 days'
+                    WHERE pm.start_time >= CURRENT_DATE - INTERVAL '365 days'
+                    {draw_id_filter}
+                    AND pm.id > :after_id
                     ORDER BY pm.id
-                    LIMIT :limit OFFSET :offset
-                """)
-            
-            # Get the match IDs first
-            match_ids_result = session.execute(base_query, {"limit": limit, "offset": offset}).fetchall()
-            match_ids = [row[0] for row in match_ids_result]
-            
-            if not match_ids:
-                return []
-            
-            logging.info(f"Got {len(match_ids)} match IDs to process")
-            
-            # Now get full match data including participants
-            full_query = text("""
+                    LIMIT :limit
+                )
                 SELECT 
                     pm.id,
                     pm.match_identifier,
                     pm.tournament_id,
                     pm.start_time,
                     pm.match_type,
-                    pmp.person_id
-                FROM player_matches pm
+                    array_agg(pmp.person_id) AS participants
+                FROM page
+                JOIN player_matches pm ON pm.id = page.id
                 JOIN player_match_participants pmp ON pm.id = pmp.match_id
-                WHERE pm.id = ANY(:match_ids)
+                GROUP BY pm.id
                 ORDER BY pm.id
             """)
             
-            result = session.execute(full_query, {"match_ids": match_ids}).fetchall()
-            
-            # Group by match to get all participants per match
-            matches_dict = {}
-            for row in result:
-                match_id = row[0]
-                if match_id not in matches_dict:
-                    matches_dict[match_id] = {
-                        'id': row[0],
-                        'match_identifier': row[1],
-                        'tournament_id': row[2],
-                        'start_time': row[3],
-                        'match_type': row[4],
-                        'participants': []
-                    }
-                matches_dict[match_id]['participants'].append(row[5])
+            result = session.execute(query, {"limit": limit, "after_id": after_id})
+            matches_list = [dict(row._mapping) for row in result]
             
-            matches_list = list(matches_dict.values())
-            
-            logging.info(f"Found {len(matches_list)} matches without draw_id (offset: {offset})")
+            logging.info(f"Found {len(matches_list)} matches without draw_id (after id: {after_id})")
             return matches_list
             
         except Exception as e:
             logging.error(f"Error getting matches without draw_id: {str(e)}")
             return []
         finally:
-            session.close()
+            if conn is None:
+                session.close()
 
     def fetch_player_matches_from_api(self, person_id: str, days_back: int = 730) -> Dict:
         """Fetch player matches from the API to get draw_id information"""
+        return self.query_match_ups([person_id], days_back)
+
+    def fetch_player_matches_bulk(self, person_ids: List[str], days_back: int = 730) -> Optional[Dict[str, List[Dict]]]:
+        """Fetch several players' matches in one request and bucket them by player.
+
+        Returns None when the request fails or the API did not return every match,
+        so the caller can fall back to one request per player.
+        """
+        data = self.query_match_ups(person_ids, days_back)
+        if not data:
+            return None
         
-        query = """query matchUps($personFilter: [td_PersonFilterOptions], $filter: td_MatchUpFilterOptions) {
-            td_matchUps(personFilter: $personFilter, filter: $filter) {
-                totalItems
-                items {
-                    drawId
-                    tournament {
-                        providerTournamentId
-                    }
-                    start
-                    type
-                    sides {
-                        players {
-                            person {
-                                externalID
-                            }
-                        }
-                    }
-                    matchUpFormat
-                    status
-                    collectionPosition
-                }
+        match_ups = data['data']['td_matchUps']
+        items = match_ups.get('items') or []
+        if (match_ups.get('totalItems') or 0) > len(items):
+            logging.warning(f"Bulk request for {len(person_ids)} players was truncated, falling back to single requests")
+            return None
+        
+        matches_by_person = {person_id.lower(): [] for person_id in person_ids}
+        for item in items:
+            external_ids = {
+                player['person']['externalID'].lower()
+                for side in item.get('sides') or []
+                if side
+                for player in side.get('players') or []
+                if player and player.get('person') and player['person'].get('externalID')
             }
-        }"""
+            for external_id in external_ids:
+                if external_id in matches_by_person:
+                    matches_by_person[external_id].append(item)
+        
+        return {person_id: matches_by_person[person_id.lower()] for person_id in person_ids}
 
-        # Calculate date range
-        today = datetime.now()
-        start_date = (today - timedelta(days=days_back)).strftime('%Y-%m-%d')
-        end_date = today.strftime('%Y-%m-%d')
+    def fetch_participant_chunk(self, person_ids: List[str]) -> Dict[str, Optional[List[Dict]]]:
+        """Fetch API matches for a chunk of participants, one request per player if the bulk request fails"""
+        matches_by_person = self.fetch_player_matches_bulk(person_ids)
+        if matches_by_person is not None:
+            return matches_by_person
+        
+        matches_by_person = {}
+        for person_id in person_ids:
+            api_data = self.fetch_player_matches_from_api(person_id)
+            matches_by_person[person_id] = api_data['data']['td_matchUps']['items'] if api_data else None
+        return matches_by_person
+
+    def query_match_ups(self, person_ids: List[str], days_back: int = 730) -> Dict:
+        """Run the matchUps query for the given players; returns {} if nothing came back"""
+        label = person_ids[0] if len(person_ids) == 1 else f"{len(person_ids)} players"
+        
+        start_date, end_date = match_date_range(days_back, date.today())
 
         variables = {
             "personFilter": {
-                "ids": [{
-                    "type": "ExternalID",
-                    "identifier": person_id.lower()  # API requires lowercase
-                }]
+                "ids": [
+                    {
+                        "type": "ExternalID",
+                        "identifier": person_id.lower()  # API requires lowercase
+                    }
+                    for person_id in person_ids
+                ]
             },
             "filter": {
                 "start": {"after": start_date},
                 "end": {"before": end_date},
-                "statuses": ["DEFAULTED", "RETIRED", "WALKOVER", "COMPLETED", "ABANDONED"]
+                "statuses": MATCH_UP_STATUSES
             }
         }
 
         try:
-            response = requests.post(
+            self.rate_limiter.wait()
+            response = self.session.post(
                 self.api_url,
-                json={
-                    'operationName': 'matchUps',
-                    'query': query,
-                    'variables': variables
-                },
-                headers=self.headers,
-                verify=False,
+                json={**MATCH_UPS_BODY, 'variables': variables},
                 timeout=30
             )
-            
-            if response.status_code == 200:
-                data = response.json()
-                if 'data' in data and data['data'] and 'td_matchUps' in data['data'] and data['data']['td_matchUps']:
-                    return data
-                    
-            logging.warning(f"No data returned for player {person_id}")
+        except requests.exceptions.RequestException as e:
+            # The session adapter already retried 429/5xx and connection errors; let the
+            # batch count this as an API error, and leave it uncached so a later batch retries
+            logging.error(f"Error fetching matches for {label} after retries: {str(e)}")
+            raise
+        
+        if response.status_code != 200:
+            # Remaining 4xx responses are permanent for this request
+            logging.warning(f"API returned {response.status_code} for {label}")
             return {}
-                
-        except Exception as e:
-            logging.error(f"Error fetching matches for player {person_id}: {str(e)}")
+        
+        try:
+            data = json_loads(response.content)
+        except ValueError as e:
+            logging.error(f"Invalid JSON returned for {label}: {str(e)}")
             return {}
+        
+        if 'data' in data and data['data'] and 'td_matchUps' in data['data'] and data['data']['td_matchUps']:
+            return data
+        
+        logging.warning(f"No data returned for {label}")
+        return {}
 
     def create_match_identifier_from_api_data(self, match_data: Dict) -> str:
         """Create the same match identifier used by the collector"""
         try:
-            # Extract all player IDs from both sides
-            player_ids = []
-            for side in match_data.get('sides', []):
-                if not side:
-                    continue
-                for player in side.get('players', []):
-                    if player and 'person' in player and player['person'] and 'externalID' in player['person']:
-                        player_ids.append(player['person']['externalID'])
-            
-            # Sort player IDs for consistency
-            player_ids.sort()
-            
-            # Extract date information
-            date_str = match_data.get('start', '').split('T')[0] if match_data.get('start') else 'unknown_date'
-            
-            # Extract tournament ID
-            tournament_data = match_data.get('tournament', {})
-            tournament_id = tournament_data.get('providerTournamentId', 'unknown_tournament') if tournament_data else 'unknown_tournament'
-            
-            # Extract match type
-            match_type = match_data.get('type', 'unknown_type')
+            # Extract all player IDs from both sides, sorted for consistency
+            player_ids = sorted(
+                player['person']['externalID']
+                for side in match_data.get('sides') or ()
+                if side
+                for player in side.get('players') or ()
+                if player and player.get('person') and player['person'].get('externalID')
+            )
             
-            # Extract collection position (for dual matches)
-            collection_pos = match_data.get('collectionPosition', 'np')
+            start = match_data.get('start')
+            tournament_data = match_data.get('tournament') or EMPTY_DICT
             
-            # Create identifier matching collector logic
-            identifier = f"{date_str}-{tournament_id}-{match_type}-{collection_pos}-{'-'.join(player_ids)}"
+            # Create identifier matching collector logic:
+            # date-tournament-type-collection position-player ids
+            identifier = "-".join((
+                start.split('T')[0] if start else 'unknown_date',
+                str(tournament_data.get('providerTournamentId', 'unknown_tournament')),
+                str(match_data.get('type', 'unknown_type')),
+                str(match_data.get('collectionPosition', 'np')),
+                "-".join(player_ids)
+            ))
             
             return identifier
         except Exception as e:
             logging.error(f"Error creating match identifier: {e}")
             return None
 
-    def update_match_draw_id(self, match_id: int, draw_id: str):
-        """Update a single match with its draw_id"""
-        session = self.Session()
+    def flush_draw_ids(self, pending: Dict[int, str], conn=None, raise_errors: bool = False) -> int:
+        """Write resolved draw_ids in a single UPDATE ... FROM (VALUES ...) and clear pending.
+
+        Uses conn (a raw DBAPI connection) when given, otherwise checks one out for this write.
+        A failed write is logged and counted as 0, or re-raised when raise_errors is set.
+        """
+        if not pending:
+            return 0
+        
+        own_conn = conn is None
+        if own_conn:
+            conn = self.engine.raw_connection()
         try:
-            session.execute(
-                text("UPDATE player_matches SET draw_id = :draw_id WHERE id = :match_id"),
-                {"draw_id": draw_id, "match_id": match_id}
-            )
-            session.commit()
-            logging.debug(f"Updated match {match_id} with draw_id {draw_id}")
-            return True
+            cur = conn.cursor()
+            try:
+                execute_values(cur, UPDATE_DRAW_IDS_SQL, list(pending.items()), page_size=1000)
+                conn.commit()
+            finally:
+                cur.close()
+            
+            updated = len(pending)
+            logging.info(f"✅ Updated {updated} matches with draw_id")
+            return updated
         except Exception as e:
-            logging.error(f"Error updating match {match_id} with draw_id {draw_id}: {str(e)}")
-            session.rollback()
-            return False
+            try:
+                conn.rollback()
+            except Exception:
+                # A dropped connection can't roll back; the original error is the one to report
+                pass
+            logging.error(f"❌ Error updating {len(pending)} matches with draw_id: {str(e)}")
+            if raise_errors:
+                raise
+            return 0
         finally:
-            session.close()
+            if own_conn:
+                conn.close()
+            pending.clear()
 
-    def process_matches_batch(self, matches: List[Dict]) -> Dict[str, int]:
-        """Process a batch of matches to get their draw_id"""
+    def write_draw_ids(self, pending: Dict[int, str]) -> int:
+        """Hand pending draw ids to the background writer if running, else write them now"""
+        if self.writer:
+            return self.writer.submit(pending)
+        return self.flush_draw_ids(pending)
+
+    def process_matches_batch(self, matches: List[Dict], api_cache: Optional[Dict[str, Optional[List]]] = None) -> Dict[str, int]:
+        """Process a batch of matches to get their draw_id.
+
+        api_cache maps participant id -> (identifier, draw_id) pairs from earlier fetches
+        (None when the API had nothing), and is filled in as participants are fetched.
+        """
+        if api_cache is None:
+            api_cache = {}
+        
         stats = {
             'processed': 0,
             'updated': 0,
@@ -353,6 +599,14 @@ class PlayerMatchesDrawIdBackfill:
             'api_errors': 0
         }
         
+        # match id -> draw_id, written in bulk by write_draw_ids
+        pending = {}
+        
+        # Every DB match of the batch by identifier, so each one is resolved and written at most once
+        db_by_ident = {match['match_identifier']: match['id'] for match in matches}
+        resolved = set()
+        checked = set()
+        
         # Group matches by participant to minimize API calls
         participants_matches = {}
         for match in matches:
@@ -361,59 +615,146 @@ class PlayerMatchesDrawIdBackfill:
                     participants_matches[participant_id] = []
                 participants_matches[participant_id].append(match)
         
-        for participant_id, participant_matches in participants_matches.items():
-            try:
-                logging.info(f"Fetching API data for participant {participant_id} ({len(participant_matches)} matches)")
-                
-                # Fetch API data for this participant
-                api_data = self.fetch_player_matches_from_api(participant_id)
-                
-                if not api_data or 'data' not in api_data or not api_data['data']:
-                    stats['no_api_data'] += len(participant_matches)
-                    continue
-                
-                api_matches = api_data['data']['td_matchUps']['items']
-                if not api_matches:
-                    stats['no_api_data'] += len(participant_matches)
-                    continue
-                
-                # Create lookup dictionary for API matches by identifier
-                api_matches_lookup = {}
-                for api_match in api_matches:
-                    identifier = self.create_match_identifier_from_api_data(api_match)
-                    if identifier and api_match.get('drawId'):
-                        api_matches_lookup[identifier] = api_match['drawId']
+        def apply_participant(participant_id: str, draw_pairs: Optional[List]):
+            participant_matches = participants_matches[participant_id]
+            if not draw_pairs:
+                stats['no_api_data'] += len(participant_matches)
+                return
+            
+            checked.update(match['id'] for match in participant_matches)
+            for identifier, draw_id in draw_pairs:
+                match_id = db_by_ident.get(identifier)
+                if match_id is not None and match_id not in resolved:
+                    resolved.add(match_id)
+                    pending[match_id] = draw_id
+        
+        # Participants fetched by an earlier batch need no request
+        to_fetch = []
+        for participant_id in participants_matches:
+            if participant_id in api_cache:
+                apply_participant(participant_id, api_cache[participant_id])
+            else:
+                to_fetch.append(participant_id)
+        
+        # Fetch in waves of one chunk per worker, so participants whose matches were all
+        # resolved through a partner in an earlier wave are never requested
+        wave_size = API_WORKERS * PERSONS_PER_REQUEST
+        with ThreadPoolExecutor(max_workers=API_WORKERS) as executor:
+            while to_fetch:
+                to_fetch = [
+                    participant_id for participant_id in to_fetch
+                    if any(match['id'] not in resolved for match in participants_matches[participant_id])
+                ]
+                wave, to_fetch = to_fetch[:wave_size], to_fetch[wave_size:]
+                chunks = [wave[i:i + PERSONS_PER_REQUEST] for i in range(0, len(wave), PERSONS_PER_REQUEST)]
                 
-                # Match our database matches with API matches
-                for db_match in participant_matches:
-                    stats['processed'] += 1
+                # Matching and DB writes stay on this thread
+                futures = {executor.submit(self.fetch_participant_chunk, chunk): chunk for chunk in chunks}
+                for future in as_completed(futures):
+                    try:
+                        fetched = future.result()
+                    except Exception as e:
+                        logging.error(f"Error fetching participants {futures[future]}: {str(e)}")
+                        stats['api_errors'] += sum(len(participants_matches[pid]) for pid in futures[future])
+                        continue
                     
-                    # Try to find matching API match
-                    if db_match['match_identifier'] in api_matches_lookup:
-                        draw_id = api_matches_lookup[db_match['match_identifier']]
+                    for participant_id, api_matches in fetched.items():
+                        logging.info(f"Fetched API data for participant {participant_id} ({len(participants_matches[participant_id])} matches)")
                         
-                        if self.update_match_draw_id(db_match['id'], draw_id):
-                            stats['updated'] += 1
-                            logging.info(f"✅ Updated match {db_match['id']} with draw_id {draw_id}")
-                        else:
-                            logging.error(f"❌ Failed to update match {db_match['id']}")
-                    else:
-                        stats['no_draw_id'] += 1
-                        logging.warning(f"⚠️  No draw_id found for match {db_match['id']} ({db_match['match_identifier']})")
-                
-                # Add small delay between API calls
-                import time
-                time.sleep(1)
-                
-            except Exception as e:
-                logging.error(f"Error processing participant {participant_id}: {str(e)}")
-                stats['api_errors'] += len(participant_matches)
-                continue
+                        api_cache[participant_id] = self.extract_draw_pairs(api_matches)
+                        apply_participant(participant_id, api_cache[participant_id])
+                    
+                    if len(pending) >= DRAW_ID_FLUSH_SIZE:
+                        stats['updated'] += self.write_draw_ids(pending)
+        
+        stats['updated'] += self.write_draw_ids(pending)
+        
+        stats['processed'] = len(checked)
+        for match in matches:
+            if match['id'] in checked and match['id'] not in resolved:
+                stats['no_draw_id'] += 1
+                logging.warning(f"⚠️  No draw_id found for match {match['id']} ({match['match_identifier']})")
         
         return stats
 
-    def run_backfill(self, batch_size: int = 500, max_batches: int = None):
-        """Run the complete backfill process"""
+    def extract_draw_pairs(self, api_matches: Optional[List[Dict]]) -> Optional[List]:
+        """Reduce a player's API matches to (identifier, draw_id) pairs; None if there were none"""
+        if not api_matches:
+            return None
+        
+        draw_pairs = []
+        for api_match in api_matches:
+            draw_id = api_match.get('drawId')
+            if draw_id:
+                identifier = self.create_match_identifier_from_api_data(api_match)
+                if identifier:
+                    draw_pairs.append((identifier, draw_id))
+        return draw_pairs
+
+    def iter_paged_batches(self, batch_size: int, after_id: int = 0, conn=None):
+        """Yield batches of matches without draw_id, one keyset-paged query per batch"""
+        last_id = after_id
+        while True:
+            matches = self.get_player_matches_without_draw_id(batch_size, last_id, conn)
+            
+            if not matches:
+                logging.info("No more matches to process")
+                return
+            
+            yield matches
+            
+            # Continue after the last id of this batch; updated rows leave the
+            # draw_id IS NULL set, so an OFFSET would skip rows
+            last_id = max(match['id'] for match in matches)
+            
+            # If we got fewer matches than requested, we're done
+            if len(matches) < batch_size:
+                logging.info(f"Got {len(matches)} matches (less than batch size {batch_size}), this was the last batch")
+                return
+
+    def iter_streamed_batches(self, batch_size: int, after_id: int = 0):
+        """Yield batches of matches without draw_id from a single server-side cursor.
+
+        For when the partial index is not available: one plan and one scan serve the
+        whole backfill instead of a fresh query per page.
+        """
+        with self.engine.connect().execution_options(stream_results=True, yield_per=batch_size) as conn:
+            draw_id_filter = "AND (pm.draw_id IS NULL OR pm.draw_id = '')" if self.draw_id_column_exists(conn) else ""
+            result = conn.execute(text(f"""
+                SELECT 
+                    pm.id,
+                    pm.match_identifier,
+                    pm.tournament_id,
+                    pm.start_time,
+                    pm.match_type,
+                    array_agg(pmp.person_id) AS participants
+                FROM player_matches pm
+                JOIN player_match_participants pmp ON pm.id = pmp.match_id
+                WHERE pm.start_time >= CURRENT_DATE - INTERVAL '365 days'
+                {draw_id_filter}
+                AND pm.id > :after_id
+                GROUP BY pm.id
+                ORDER BY pm.id
+            """), {"after_id": after_id})
+            
+            for rows in result.partitions(batch_size):
+                yield [dict(row._mapping) for row in rows]
+        
+        logging.info("No more matches to process")
+
+    def run_backfill(self, batch_size: int = 500, max_batches: int = None, stream: bool = False,
+                     checkpoint_path: str = 'player_matches_draw_id_backfill.sqlite', resume: bool = False):
+        """Run the complete backfill process.
+
+        stream=True reads every match through one server-side cursor instead of keyset pages.
+        The last finished batch is recorded in checkpoint_path; resume=True starts after it,
+        so matches the API could not resolve are not fetched again after a restart. The
+        checkpoint stops at the last batch before one with API errors, so those are retried.
+        """
+        checkpoint = BackfillCheckpoint(checkpoint_path)
+        # One autocommit connection serves every read of the run instead of a session per query
+        read_conn = self.engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        self.writer = DrawIdWriter(self, checkpoint)
         try:
             logging.info("Starting player_matches draw_id backfill...")
             
@@ -421,7 +762,7 @@ class PlayerMatchesDrawIdBackfill:
             self.add_draw_id_column()
             
             # Step 2: Get total count for progress tracking
-            total_matches = self.get_total_matches_needing_draw_id()
+            total_matches = self.get_total_matches_needing_draw_id(read_conn)
             logging.info(f"Total matches needing draw_id: {total_matches:,}")
             
             # Step 3: Process matches in batches
@@ -434,25 +775,31 @@ class PlayerMatchesDrawIdBackfill:
             }
             
             batch_count = 0
-            offset = 0
-            while True:
+            fetched = 0
+            # Players recur across batches; keep what the API told us about each one
+            api_cache = {}
+            # Set once a batch hits API errors; later batches must not move the checkpoint past it
+            checkpoint_held = False
+            after_id = checkpoint.last_id() if resume else 0
+            if after_id:
+                logging.info(f"Resuming after match id {after_id:,} from {checkpoint_path}")
+            
+            if stream:
+                batches = self.iter_streamed_batches(batch_size, after_id)
+            else:
+                batches = self.iter_paged_batches(batch_size, after_id, read_conn)
+            for matches in batches:
                 if max_batches and batch_count >= max_batches:
                     logging.info(f"Reached maximum batch limit ({max_batches})")
                     break
                 
-                # Get next batch of matches
-                matches = self.get_player_matches_without_draw_id(batch_size, offset)
-                
-                if not matches:
-                    logging.info("No more matches to process")
-                    break
-                
                 batch_count += 1
-                progress = (offset + len(matches)) / total_matches * 100 if total_matches > 0 else 0
-                logging.info(f"Processing batch {batch_count} ({len(matches)} matches, offset: {offset:,}, progress: {progress:.1f}%)...")
+                fetched += len(matches)
+                progress = fetched / total_matches * 100 if total_matches > 0 else 0
+                logging.info(f"Processing batch {batch_count} ({len(matches)} matches, from id: {matches[0]['id']:,}, progress: {progress:.1f}%)...")
                 
                 # Process this batch
-                batch_stats = self.process_matches_batch(matches)
+                batch_stats = self.process_matches_batch(matches, api_cache)
                 
                 # Update totals
                 for key in total_stats:
@@ -461,13 +808,20 @@ class PlayerMatchesDrawIdBackfill:
                 # Log batch results
                 logging.info(f"Batch {batch_count} completed: {batch_stats}")
                 
-                # Update offset for next batch
-                offset += len(matches)
+                if batch_stats['api_errors'] and not checkpoint_held:
+                    checkpoint_held = True
+                    logging.warning(f"Batch {batch_count} had API errors; keeping the checkpoint before match id {matches[0]['id']:,}")
                 
-                # If we got fewer matches than requested, we're done
-                if len(matches) < batch_size:
-                    logging.info(f"Got {len(matches)} matches (less than batch size {batch_size}), this was the last batch")
-                    break
+                # Queued behind this batch's draw ids, so it is only saved once they are written
+                if not checkpoint_held:
+                    self.writer.mark(matches[-1]['id'])
+            
+            # Wait for the last queued writes before reporting
+            self.writer.close()
+            total_stats['updated'] = self.writer.updated
+            if self.writer.failed:
+                logging.warning(f"Some draw id writes failed; the checkpoint in {checkpoint_path} was held before them")
+            self.writer = None
             
             # Final summary
             logging.info("🎉 Backfill completed!")
@@ -484,6 +838,12 @@ class PlayerMatchesDrawIdBackfill:
         except Exception as e:
             logging.error(f"Backfill failed: {str(e)}")
             raise
+        finally:
+            if self.writer:
+                self.writer.close()
+                self.writer = None
+            read_conn.close()
+            checkpoint.close()
 
 def main():
     """Main function to run the backfill"""
@@ -7,7 +7,11 @@ This will help us understand what we're getting and filter properly
 import os
 import sys
 import json
+import re
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import InsecureRequestWarning
+from urllib3.util.retry import Retry
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Dict, List, Any
@@ -16,6 +20,13 @@ from typing import Dict, List, Any
 backend_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(backend_root))
 
+# Tournament name patterns for dual match detection; each pattern is its own indicator
+VS_PATTERN_RE = re.compile(r' (?:vs|v|@|at) ', re.IGNORECASE)
+DUAL_KEYWORD_RE = re.compile(r'dual|match|versus', re.IGNORECASE)
+
+# The session skips certificate verification; silence the per-request warning
+requests.packages.urllib3.disable_warnings(category=InsecureRequestWarning)
+
 class TournamentDataInspector:
     def __init__(self):
         # API configuration
@@ -38,6 +49,21 @@ class TournamentDataInspector:
             'Pragma': 'no-cache',
             'Cache-Control': 'no-cache'
         }
+        
+        # Keep the connection alive between pages and retry transient failures on the search POST
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.verify = False
+        self.session.mount('https://', HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=20,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=frozenset(['POST'])
+            )
+        ))
 
     def create_search_payload(self, 
                             from_date: str = None,
@@ -95,13 +121,7 @@ class TournamentDataInspector:
             
             url = f"{self.api_url}?indexSchema={self.index_schema}"
             
-            response = requests.post(
-                url,
-                json=payload,
-                headers=self.headers,
-                timeout=30,
-                verify=False
-            )
+            response = self.session.post(url, json=payload, timeout=30)
             
             if response.status_code == 200:
                 data = response.json()
@@ -146,13 +166,11 @@ class TournamentDataInspector:
             dual_match_indicators.append("org name has parentheses (likely team designation)")
         
         # Check tournament name for "vs" or dual match patterns
-        vs_patterns = [' vs ', ' v ', ' @ ', ' at ']
-        if any(pattern in tournament_name.lower() for pattern in vs_patterns):
+        if VS_PATTERN_RE.search(tournament_name):
             dual_match_indicators.append("tournament name contains vs/at patterns")
         
         # Check for specific dual match keywords
-        dual_keywords = ['dual', 'match', 'versus']
-        if any(keyword in tournament_name.lower() for keyword in dual_keywords):
+        if DUAL_KEYWORD_RE.search(tournament_name):
             dual_match_indicators.append("tournament name contains dual match keywords")
         
         # Check number of events - dual matches typically have fewer events
@@ -1,12 +1,193 @@
-import urllib.request
-import urllib.parse
 import json
 from datetime import datetime, timedelta
-from typing import Dict
-import ssl
-import gzip
+from typing import Dict, List
 import logging
 import os
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import InsecureRequestWarning
+from urllib3.util.retry import Retry
+
+# The session skips certificate verification; silence the per-request warning
+requests.packages.urllib3.disable_warnings(category=InsecureRequestWarning)
+
+# Selection sets shared by the single-player queries and the aliased batch query
+COMPREHENSIVE_MATCH_UP_FIELDS = """{
+    totalItems
+    items {
+        id
+        matchUpId
+        matchId
+        eventId
+        drawId
+        collectionId
+        matchUpStatus
+        matchUpFormat
+        matchUpType
+        venue
+        court
+        surface
+        weather
+        notes
+        discipline
+        category
+        gender
+        winnerMatchUpId
+        loserMatchUpId
+        score {
+            scoreString
+            sets {
+                winnerGamesWon
+                loserGamesWon
+                winRatio
+                tiebreaker {
+                    winnerPointsWon
+                    loserPointsWon
+                }
+            }
+            superTiebreak {
+                winnerPointsWon
+                loserPointsWon
+            }
+        }
+        sides {
+            sideNumber
+            notes
+            players {
+                playerNumber
+                person {
+                    externalID
+                    nativeFamilyName
+                    nativeGivenName
+                    tennisId
+                    utrId
+                    ranking
+                }
+            }
+            extensions {
+                name
+                value
+                description
+            }
+        }
+        winningSide
+        start
+        end
+        type
+        matchUpFormat
+        status
+        tournament {
+            id
+            providerTournamentId
+            tournamentName
+            tournamentId
+            name
+            startDate
+            endDate
+            venue
+            surface
+            category
+        }
+        event {
+            id
+            eventId
+            eventName
+            name
+            eventType
+            gender
+            category
+        }
+        extensions {
+            name
+            value
+            description
+        }
+        roundName
+        roundNumber
+        roundPosition
+        collectionPosition
+        drawId
+        drawPosition
+        structureId
+        bye
+        walkover
+        defaulted
+        retired
+        scheduledDate
+        scheduledTime
+        actualStartTime
+        actualEndTime
+        duration
+        umpire
+        referee
+        courtNumber
+        courtName
+        matchNumber
+    }
+}"""
+
+MINIMAL_MATCH_UP_FIELDS = """{
+    totalItems
+    items {
+        id
+        score {
+            scoreString
+        }
+        sides {
+            sideNumber
+            players {
+                person {
+                    externalID
+                    nativeFamilyName
+                    nativeGivenName
+                }
+            }
+            extensions {
+                name
+                value
+            }
+        }
+        winningSide
+        start
+        end
+        type
+        matchUpFormat
+        status
+        tournament {
+            providerTournamentId
+        }
+        extensions {
+            name
+            value
+        }
+        roundName
+        collectionPosition
+        drawId
+    }
+}"""
+
+MATCH_UP_STATUSES = ["DEFAULTED", "RETIRED", "WALKOVER", "COMPLETED", "ABANDONED"]
+
+# Keep each aliased document small enough for the server's payload limits
+PERSONS_PER_BATCH_QUERY = 25
+
+def match_up_filter(days_back: int) -> Dict:
+    """Build the date/status filter covering the last days_back days"""
+    today = datetime.now()
+    return {
+        "start": {"after": (today - timedelta(days=days_back)).strftime('%Y-%m-%d')},
+        "end": {"before": today.strftime('%Y-%m-%d')},
+        "statuses": MATCH_UP_STATUSES
+    }
+
+def person_filter(person_id: str) -> Dict:
+    """Build the personFilter selecting one player by external ID"""
+    return {
+        "ids": [{
+            "type": "ExternalID",
+            "identifier": person_id
+        }]
+    }
 
 def setup_logging():
     """Setup logging to both file and console"""
@@ -46,144 +227,33 @@ class EnhancedTennisMatchFetcher:
             'Cache-Control': 'no-cache'
         }
         self.logger = logging.getLogger(__name__)
+        
+        # Reuse one keepalive connection for every test query; the GraphQL POST is a read, so retrying is safe
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.verify = False
+        self.session.mount('https://', HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=20,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=frozenset(['POST'])
+            )
+        ))
 
     def fetch_player_matches_comprehensive(self, person_id: str, days_back: int = 360) -> Dict:
         """Fetch match results with comprehensive field selection"""
         
         # Let's try to include ALL potential fields we might want
-        query = """query matchUps($personFilter: [td_PersonFilterOptions], $filter: td_MatchUpFilterOptions) {
-            td_matchUps(personFilter: $personFilter, filter: $filter) {
-                totalItems
-                items {
-                    id
-                    matchUpId
-                    matchId
-                    eventId
-                    drawId
-                    collectionId
-                    matchUpStatus
-                    matchUpFormat
-                    matchUpType
-                    venue
-                    court
-                    surface
-                    weather
-                    notes
-                    discipline
-                    category
-                    gender
-                    winnerMatchUpId
-                    loserMatchUpId
-                    score {
-                        scoreString
-                        sets {
-                            winnerGamesWon
-                            loserGamesWon
-                            winRatio
-                            tiebreaker {
-                                winnerPointsWon
-                                loserPointsWon
-                            }
-                        }
-                        superTiebreak {
-                            winnerPointsWon
-                            loserPointsWon
-                        }
-                    }
-                    sides {
-                        sideNumber
-                        notes
-                        players {
-                            playerNumber
-                            person {
-                                externalID
-                                nativeFamilyName
-                                nativeGivenName
-                                tennisId
-                                utrId
-                                ranking
-                            }
-                        }
-                        extensions {
-                            name
-                            value
-                            description
-                        }
-                    }
-                    winningSide
-                    start
-                    end
-                    type
-                    matchUpFormat
-                    status
-                    tournament {
-                        id
-                        providerTournamentId
-                        tournamentName
-                        tournamentId
-                        name
-                        startDate
-                        endDate
-                        venue
-                        surface
-                        category
-                    }
-                    event {
-                        id
-                        eventId
-                        eventName
-                        name
-                        eventType
-                        gender
-                        category
-                    }
-                    extensions {
-                        name
-                        value
-                        description
-                    }
-                    roundName
-                    roundNumber
-                    roundPosition
-                    collectionPosition
-                    drawId
-                    drawPosition
-                    structureId
-                    bye
-                    walkover
-                    defaulted
-                    retired
-                    scheduledDate
-                    scheduledTime
-                    actualStartTime
-                    actualEndTime
-                    duration
-                    umpire
-                    referee
-                    courtNumber
-                    courtName
-                    matchNumber
-                }
-            }
-        }"""
-
-        # Calculate date range
-        today = datetime.now()
-        days_ago = (today - timedelta(days=days_back)).strftime('%Y-%m-%d')
-        current_date = today.strftime('%Y-%m-%d')
+        query = f"""query matchUps($personFilter: [td_PersonFilterOptions], $filter: td_MatchUpFilterOptions) {{
+            td_matchUps(personFilter: $personFilter, filter: $filter) {COMPREHENSIVE_MATCH_UP_FIELDS}
+        }}"""
 
         variables = {
-            "personFilter": {
-                "ids": [{
-                    "type": "ExternalID",
-                    "identifier": person_id
-                }]
-            },
-            "filter": {
-                "start": {"after": days_ago},
-                "end": {"before": current_date},
-                "statuses": ["DEFAULTED", "RETIRED", "WALKOVER", "COMPLETED", "ABANDONED"]
-            }
+            "personFilter": person_filter(person_id),
+            "filter": match_up_filter(days_back)
         }
 
         return self._make_request(query, variables, "comprehensive")
@@ -191,69 +261,50 @@ class EnhancedTennisMatchFetcher:
     def fetch_player_matches_minimal_test(self, person_id: str, days_back: int = 360) -> Dict:
         """Test with just the basic fields we know work plus ID"""
         
-        query = """query matchUps($personFilter: [td_PersonFilterOptions], $filter: td_MatchUpFilterOptions) {
-            td_matchUps(personFilter: $personFilter, filter: $filter) {
-                totalItems
-                items {
-                    id
-                    score {
-                        scoreString
-                    }
-                    sides {
-                        sideNumber
-                        players {
-                            person {
-                                externalID
-                                nativeFamilyName
-                                nativeGivenName
-                            }
-                        }
-                        extensions {
-                            name
-                            value
-                        }
-                    }
-                    winningSide
-                    start
-                    end
-                    type
-                    matchUpFormat
-                    status
-                    tournament {
-                        providerTournamentId
-                    }
-                    extensions {
-                        name
-                        value
-                    }
-                    roundName
-                    collectionPosition
-                    drawId
-                }
-            }
-        }"""
-
-        # Calculate date range
-        today = datetime.now()
-        days_ago = (today - timedelta(days=days_back)).strftime('%Y-%m-%d')
-        current_date = today.strftime('%Y-%m-%d')
+        query = f"""query matchUps($personFilter: [td_PersonFilterOptions], $filter: td_MatchUpFilterOptions) {{
+            td_matchUps(personFilter: $personFilter, filter: $filter) {MINIMAL_MATCH_UP_FIELDS}
+        }}"""
 
         variables = {
-            "personFilter": {
-                "ids": [{
-                    "type": "ExternalID",
-                    "identifier": person_id
-                }]
-            },
-            "filter": {
-                "start": {"after": days_ago},
-                "end": {"before": current_date},
-                "statuses": ["DEFAULTED", "RETIRED", "WALKOVER", "COMPLETED", "ABANDONED"]
-            }
+            "personFilter": person_filter(person_id),
+            "filter": match_up_filter(days_back)
         }
 
         return self._make_request(query, variables, "minimal with ID")
 
+    def fetch_players_batch(self, person_ids: List[str], days_back: int = 360,
+                            fields: str = MINIMAL_MATCH_UP_FIELDS) -> Dict[str, Dict]:
+        """Fetch matches for several players, one aliased td_matchUps per player in each request"""
+        results = {}
+        
+        for start in range(0, len(person_ids), PERSONS_PER_BATCH_QUERY):
+            chunk = person_ids[start:start + PERSONS_PER_BATCH_QUERY]
+            
+            # p0, p1, ... alias the same selection, each bound to its own $fN person filter
+            params = ", ".join(f"$f{i}: [td_PersonFilterOptions]" for i in range(len(chunk)))
+            selections = "\n".join(
+                f"p{i}: td_matchUps(personFilter: $f{i}, filter: $filter) {fields}"
+                for i in range(len(chunk))
+            )
+            query = f"query matchUps({params}, $filter: td_MatchUpFilterOptions) {{\n{selections}\n}}"
+            
+            variables = {f"f{i}": person_filter(person_id) for i, person_id in enumerate(chunk)}
+            variables["filter"] = match_up_filter(days_back)
+            
+            data = self._make_request(query, variables, f"batch of {len(chunk)} players")
+            batch_data = (data or {}).get('data') or {}
+            
+            for i, person_id in enumerate(chunk):
+                match_ups = batch_data.get(f"p{i}")
+                results[person_id] = match_ups or {}
+                if match_ups:
+                    self.logger.info(f"Player {person_id}: {len(match_ups.get('items') or [])} matches "
+                                     f"out of {match_ups.get('totalItems', 0)} total")
+                else:
+                    self.logger.info(f"Player {person_id}: no td_matchUps result")
+        
+        return results
+
     def _make_request(self, query, variables, query_type):
         """Make the GraphQL request"""
         try:
@@ -265,70 +316,51 @@ class EnhancedTennisMatchFetcher:
                 'variables': variables
             }
             
-            json_data = json.dumps(request_data).encode('utf-8')
+            response = self.session.post(self.api_url, json=request_data, timeout=30)
             
-            req = urllib.request.Request(
-                self.api_url,
-                data=json_data,
-                headers=self.headers,
-                method='POST'
-            )
-            
-            ssl_context = ssl.create_default_context()
-            ssl_context.check_hostname = False
-            ssl_context.verify_mode = ssl.CERT_NONE
-            
-            with urllib.request.urlopen(req, context=ssl_context) as response:
-                if response.status == 200:
-                    raw_data = response.read()
-                    
-                    if raw_data.startswith(b'\x1f\x8b'):
-                        response_data = gzip.decompress(raw_data).decode('utf-8')
-                        self.logger.info("Response was gzipped, decompressed successfully")
-                    else:
-                        response_data = raw_data.decode('utf-8')
-                    
-                    data = json.loads(response_data)
+            if response.status_code == 200:
+                # requests undoes the gzip transfer encoding itself
+                data = response.json()
+                
+                # Check for GraphQL errors
+                if 'errors' in data:
+                    self.logger.error(f"GraphQL errors in {query_type}: {data['errors']}")
                     
-                    # Check for GraphQL errors
-                    if 'errors' in data:
-                        self.logger.error(f"GraphQL errors in {query_type}: {data['errors']}")
+                    # Try to identify which fields caused errors
+                    for error in data['errors']:
+                        if 'message' in error:
+                            self.logger.error(f"Error message: {error['message']}")
+                        if 'path' in error:
+                            self.logger.error(f"Error path: {error['path']}")
+                
+                if data and 'data' in data and data['data'] and 'td_matchUps' in data['data']:
+                    match_ups = data['data']['td_matchUps']
+                    if match_ups:
+                        items = match_ups.get('items', [])
+                        total_items = match_ups.get('totalItems', 0)
+                        self.logger.info(f"Found {len(items)} matches out of {total_items} total for player")
                         
-                        # Try to identify which fields caused errors
-                        for error in data['errors']:
-                            if 'message' in error:
-                                self.logger.error(f"Error message: {error['message']}")
-                            if 'path' in error:
-                                self.logger.error(f"Error path: {error['path']}")
-                    
-                    if data and 'data' in data and data['data'] and 'td_matchUps' in data['data']:
-                        match_ups = data['data']['td_matchUps']
-                        if match_ups:
-                            items = match_ups.get('items', [])
-                            total_items = match_ups.get('totalItems', 0)
-                            self.logger.info(f"Found {len(items)} matches out of {total_items} total for player")
+                        # If we have matches, show the structure of the first one
+                        if items:
+                            self.logger.info(f"Sample match structure (first match):")
+                            self.logger.info(f"Available fields: {list(items[0].keys())}")
                             
-                            # If we have matches, show the structure of the first one
-                            if items:
-                                self.logger.info(f"Sample match structure (first match):")
-                                self.logger.info(f"Available fields: {list(items[0].keys())}")
-                                
-                                # Log any ID-like fields
-                                id_fields = {}
-                                for key, value in items[0].items():
-                                    if 'id' in key.lower() or key in ['id', 'matchUpId', 'drawId']:
-                                        id_fields[key] = value
-                                
-                                if id_fields:
-                                    self.logger.info(f"ID-like fields found: {id_fields}")
-                        else:
-                            self.logger.info("td_matchUps is None or empty")
-                    
-                    return data
-                else:
-                    self.logger.error(f"Error fetching matches: Status {response.status}")
-                    return {}
+                            # Log any ID-like fields
+                            id_fields = {}
+                            for key, value in items[0].items():
+                                if 'id' in key.lower() or key in ['id', 'matchUpId', 'drawId']:
+                                    id_fields[key] = value
+                            
+                            if id_fields:
+                                self.logger.info(f"ID-like fields found: {id_fields}")
+                    else:
+                        self.logger.info("td_matchUps is None or empty")
                 
+                return data
+            else:
+                self.logger.error(f"Error fetching matches: Status {response.status_code}")
+                return {}
+            
         except Exception as e:
             self.logger.error(f"Error fetching matches ({query_type}): {e}")
             import traceback
@@ -1,6 +1,7 @@
 # scripts/update_tournament_draws.py
 import os
 import sys
+import time
 from pathlib import Path
 import logging
 import argparse
@@ -139,7 +140,6 @@ def update_tournament_draws(extended: bool = False):
                     logging.error(f"❌ Failed to process tournament event {i}/{len(tournament_events)}")
                 
                 # Small delay between requests to be respectful to the API
-                import time
                 time.sleep(1.0)  # Slightly longer delay for GraphQL API
                 
             except Exception as e:
@@ -1,6 +1,7 @@
 # scripts/update_tournament_players.py
 import os
 import sys
+import time
 from pathlib import Path
 import logging
 from datetime import datetime, timedelta
@@ -102,7 +103,6 @@ def update_tournament_players():
                 success_count += 1
                 
                 # Small delay between requests to be respectful to the API
-                import time
                 time.sleep(0.5)
                 
             except Exception as e: